@@ -34,6 +34,14 @@ def run_streamlit_ui():
         except Exception:
             pass
 
+    # Start parsing the dataset now so the first module click finds it warm
+    try:
+        from services.data_service import warm_up, warmup_status
+
+        warm_up()
+    except Exception:
+        warmup_status = None
+
     # ---------------------------------------------------
     # ASSETS
     # ---------------------------------------------------
@@ -441,6 +449,30 @@ def run_streamlit_ui():
     st.markdown('<div class="secTitle">📊 Analytics Modules</div>', unsafe_allow_html=True)
     st.markdown('<div class="secSub">Click <b>Open module</b> to navigate.</div>', unsafe_allow_html=True)
 
+    if warmup_status is not None:
+
+        def readiness_caption(status: dict) -> None:
+            if status["state"] == "ready":
+                st.caption(f"🟢 Dataset ready — {status['rows']:,} rows loaded in {status['ms']:.0f} ms")
+            elif status["state"] == "warming":
+                st.caption(f"🟡 Loading dataset in the background… ({status['elapsed_ms'] / 1000:.1f} s)")
+            elif status["state"] == "failed":
+                st.caption(f"🔴 Dataset warm-up failed: {status['error']}")
+
+        # Poll only while warming; once the state is final, a full rerun swaps in the static caption
+        @st.fragment(run_every=2.0)
+        def data_readiness():
+            status = warmup_status()
+            if status["state"] != "warming":
+                st.rerun()
+            readiness_caption(status)
+
+        status = warmup_status()
+        if status["state"] == "warming":
+            data_readiness()
+        else:
+            readiness_caption(status)
+
     r1c1, r1c2 = st.columns(2, gap="small")
     with r1c1:
         render_box_card(
@@ -481,7 +513,7 @@ def run_streamlit_ui():
 # =============================================================
 # CLI MODE
 # =============================================================
-def run_cli():
+def run_cli(rebuild_cache: bool = False):
     """
     CLI entry point for Singapore Airlines Analytics System.
 
@@ -489,6 +521,7 @@ def run_cli():
     summaries of analytics modules. It also serves as a
     demonstration of command-line interface design.
 
+    :param rebuild_cache: re-parse train.csv and rewrite its binary sidecar
     :return: None
     """
     from pages.Module1_Flight_Performance import run_flight_performance_cli
@@ -496,6 +529,13 @@ def run_cli():
     from pages.Module3_Risk_Simulation import run_risk_simulation_cli
     from pages.Module4_Cloud_Analytics import run_cloud_analytics_cli
 
+    if rebuild_cache:
+        from services.data_service import ingestion_info, load_data
+
+        print("Rebuilding dataset sidecar cache...")
+        load_data(rebuild_sidecar=True)
+        info = ingestion_info()
+        print(f"Sidecar ({info.get('format', 'none')}) rebuilt from CSV in {info.get('csv_ms', 0):.0f} ms.")
 
     print("===========================================")
     print("   Singapore Airlines Analytics System CLI")
@@ -544,6 +584,10 @@ def run_cli():
 # =============================================================
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1].lower() == "cli":
-        run_cli()
+        run_cli(rebuild_cache="--rebuild-cache" in sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1].lower() == "generate":
+        from services.generator_service import main as generate_main
+
+        generate_main(sys.argv[2:])
     else:
         run_streamlit_ui()
@@ -19,7 +19,22 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from services.data_service import load_data
+from services.fuel_service import DEFAULT_FUEL_MODEL, FUEL_MODELS, estimate_fuel, fuel_fields
+from services.data_service import (
+    load_data, numeric_column, schema_map,
+    column_stats, correlation_matrix, data_profile,
+    quantiles, range_quantiles, range_sums, sample_permutation, sorted_index, value_histogram,
+)
+from services.sqlite_service import (
+    iter_sql_rows, sql_aggregate, sql_extent, sql_histogram, sql_quantiles, sql_rows, storage_backend,
+)
+
+# Logical fields this module reads (resolved by services.schema_service)
+CREW_FIELDS = ["onboard_service", "inflight_service", "checkin_service"]
+FLIGHT_COLUMNS = ["distance", "dep_delay", "arr_delay", *CREW_FIELDS]
+
+# Delay percentiles shown in KPIs / CLI
+DELAY_PERCENTILES = (50, 90, 95, 99)
 
 
 # ============================================================
@@ -36,18 +51,6 @@ def _safe_apply_global_styles() -> bool:
         return False
 
 
-def _first_existing_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
-    """Return first existing column name (case-safe)."""
-    cols_lower = {c.lower(): c for c in df.columns}
-    for cand in candidates:
-        if cand in df.columns:
-            return cand
-        cl = cand.lower()
-        if cl in cols_lower:
-            return cols_lower[cl]
-    return None
-
-
 def _render_html(st, html: str) -> None:
     """
     Streamlit Markdown turns lines with 4+ leading spaces into CODE.
@@ -173,28 +176,78 @@ def _kpi_cards(st, items: list[tuple[str, str, str]]) -> None:
     _render_html(st, f'<div class="kpiGrid">{"".join(cards)}</div>')
 
 
+def _density_plot(st, x: np.ndarray, y: np.ndarray, xlabel: str, ylabel: str, grid: tuple[int, int] = (160, 100)) -> None:
+    """
+    Bin every (x, y) pair into a fixed grid and draw it as a log-scaled
+    heatmap: drawing cost depends on the grid, not on the row count.
+    """
+    ok = ~np.isnan(x) & ~np.isnan(y)
+    x, y = x[ok], y[ok]
+    if x.size == 0:
+        st.info("No rows with both values in the selected range.")
+        return
+    x_edges = np.linspace(x.min(), x.max() if x.max() > x.min() else x.min() + 1, grid[0] + 1)
+    y_edges = np.linspace(y.min(), y.max() if y.max() > y.min() else y.min() + 1, grid[1] + 1)
+    counts, _, _ = np.histogram2d(x, y, bins=(x_edges, y_edges))
+
+    fig, ax = plt.subplots()
+    image = ax.imshow(
+        np.log1p(counts.T),
+        origin="lower",
+        aspect="auto",
+        extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+        cmap="viridis",
+    )
+    fig.colorbar(image, ax=ax, label="log(1 + flights)")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    st.pyplot(fig, clear_figure=True)
+
+
+def _correlation_heatmap(st, corr: pd.DataFrame) -> None:
+    """Draw a correlation matrix as a diverging heatmap (-1 … 1)."""
+    if corr.empty:
+        st.info("No numeric columns available for correlations.")
+        return
+    size = max(5.0, 0.45 * len(corr))
+    fig, ax = plt.subplots(figsize=(size + 1.5, size))
+    image = ax.imshow(corr.to_numpy(), cmap="RdBu_r", vmin=-1, vmax=1)
+    ax.set_xticks(range(len(corr)), corr.columns, rotation=60, ha="right", fontsize=8)
+    ax.set_yticks(range(len(corr)), corr.index, fontsize=8)
+    fig.colorbar(image, ax=ax, label="Correlation")
+    st.pyplot(fig, clear_figure=True)
+
+
 # ============================================================
 # SHARED LOGIC — DATA PREPARATION
 # ============================================================
+def _sql_fuel_mean(model: str, where: dict) -> float:
+    """
+    Mean simulated fuel over the filtered rows on the SQLite backend:
+    fuel is not stored in the database, so the model runs on the rows
+    streamed from it in batches (nothing is loaded into the dataset cache).
+    """
+    fields = [f for f in fuel_fields(model) if schema_map().get(f)]
+    total, count = 0.0, 0
+    for batch in iter_sql_rows(fields, where=where):
+        fuel = estimate_fuel(model, frame=batch)
+        total += float(np.nansum(fuel))
+        count += int(np.count_nonzero(~np.isnan(fuel)))
+    return total / count if count else 0.0
+
+
 def prepare_flight_data() -> pd.DataFrame | None:
     """
-    Load dataset and simulate fuel consumption.
+    Load the flight columns (the shared frame is not modified; simulated
+    fuel comes from services.fuel_service as a separate array).
     Shared by both UI and CLI to ensure consistency.
     """
-    df = load_data()
+    df = load_data(columns=FLIGHT_COLUMNS)
     if df is None or df.empty:
         return None
 
-    dist_col = _first_existing_col(df, ["Flight Distance", "FlightDistance", "Distance", "flight_distance"])
-    if dist_col is None:
+    if schema_map().get("distance") is None:
         return None
-
-    # Simulate fuel consumption (academic estimation)
-    BASE_FUEL_RATE = 0.05  # kg per km
-    rng = np.random.default_rng(42)
-    distance = pd.to_numeric(df[dist_col], errors="coerce")
-
-    df["Estimated Fuel Consumption (kg)"] = distance * BASE_FUEL_RATE * rng.uniform(0.9, 1.1, size=len(df))
     return df
 
 
@@ -224,71 +277,128 @@ def run_flight_performance_ui():
     # -------------------------------
     # LOAD & PREPARE DATA
     # -------------------------------
-    df = prepare_flight_data()
-    if df is None:
+    # SQLite backend: bounds, KPIs and charts are queried from the indexed
+    # copy and only the sampled rows are fetched; no frame is loaded.
+    sqlite = storage_backend() == "sqlite"
+    schema = schema_map()
+    dist_col = schema.get("distance")
+    dep_delay_col = schema.get("dep_delay")
+    arr_delay_col = schema.get("arr_delay")
+
+    if sqlite:
+        # ✅ Total flights should be total rows from dataset
+        total_flights_all = int(sql_aggregate().iloc[0]["count"]) if dist_col else 0
+    else:
+        df = prepare_flight_data()
+        total_flights_all = 0 if df is None else int(len(df))
+    if total_flights_all == 0:
         st.error("❌ Unable to load dataset or required columns (e.g., Flight Distance) are missing.")
         st.stop()
 
-    # ✅ Total flights should be total rows from dataset
-    total_flights_all = int(len(df))
-
-    dist_col = _first_existing_col(df, ["Flight Distance", "FlightDistance", "Distance", "flight_distance"])
-    dep_delay_col = _first_existing_col(df, ["Departure Delay in Minutes", "DepartureDelay", "DepDelay", "departure_delay", "dep_delay"])
-    arr_delay_col = _first_existing_col(df, ["Arrival Delay in Minutes", "ArrivalDelay", "ArrDelay", "arrival_delay", "arr_delay"])
-
     # -------------------------------
     # FILTERS
     # -------------------------------
     _render_html(st, '<div class="section-title">🎛️ Filters</div>')
 
-    dist_series = pd.to_numeric(df[dist_col], errors="coerce").dropna()
-    if dist_series.empty:
+    if sqlite:
+        extent = sql_extent(dist_col)
+    else:
+        dist_index = sorted_index(dist_col)
+        dist_profile = data_profile(columns=[dist_col]).columns[dist_col]
+        extent = None if dist_profile.minimum is None else (dist_profile.minimum, dist_profile.maximum)
+    if extent is None:
         st.error("Distance column exists but contains no numeric values.")
         st.stop()
 
-    dmin = float(dist_series.min())
-    dmax = float(dist_series.max())
+    dmin, dmax = extent
 
     c1, c2, c3 = st.columns(3)
     with c1:
         dist_range = st.slider("Flight distance range (km)", dmin, dmax, (dmin, dmax))
     with c2:
-        sample_n = st.slider(
-            "Sample size for scatter plots",
-            1000,
-            min(50000, total_flights_all),
-            min(8000, total_flights_all),
-            step=1000,
-        )
+        if sqlite:
+            density = False  # a density grid needs every row; sampled points are fetched instead
+        else:
+            density = st.radio("Scatter rendering", ["Density (all rows)", "Sampled points"], horizontal=True) != "Sampled points"
+        if not density:
+            sample_n = st.slider(
+                "Sample size for scatter plots",
+                1000,
+                min(50000, total_flights_all),
+                min(8000, total_flights_all),
+                step=1000,
+            )
     with c3:
         bins = st.slider("Histogram bins", 10, 60, 30, step=5)
+        fuel_model = st.selectbox(
+            "Fuel model",
+            list(FUEL_MODELS),
+            index=list(FUEL_MODELS).index(DEFAULT_FUEL_MODEL),
+            format_func=lambda name: FUEL_MODELS[name].label,
+        )
+
+    available = [c for c in (schema.get(f) for f in CREW_FIELDS) if c]
+    dist_where = {dist_col: dist_range}
 
     # Filter by distance (only affects filtered KPIs / charts)
-    df_f = df.copy()
-    df_f["_dist_num"] = pd.to_numeric(df_f[dist_col], errors="coerce")
-    df_f = df_f[df_f["_dist_num"].between(dist_range[0], dist_range[1], inclusive="both")].dropna(subset=["_dist_num"])
-    total_flights_filtered = int(len(df_f))
+    sql_kpis = None
+    if sqlite:
+        # filtered count / means are computed by the engine (indexed range scan)
+        sql_kpis = sql_aggregate([dist_col, *available], where=dist_where).iloc[0]
+        total_flights_filtered = int(sql_kpis["count"])
+    else:
+        # row ids in distance order from the sorted index, no frame copy
+        span = dist_index.span(*dist_range)
+        rows = dist_index.order[span]
+        dist_f = dist_index.keys[span]
+        total_flights_filtered = int(len(rows))
 
-    if df_f.empty:
+    if total_flights_filtered == 0:
         st.warning("No records match the selected filters.")
         st.stop()
 
     # -------------------------------
     # KPI SECTION (FIXED RENDERING)
     # -------------------------------
-    avg_distance = float(df_f["_dist_num"].mean())
-
-    fuel_s = pd.to_numeric(df_f["Estimated Fuel Consumption (kg)"], errors="coerce")
-    avg_fuel = float(fuel_s.mean()) if fuel_s.notna().any() else 0.0
+    if sql_kpis is not None:
+        avg_distance = float(sql_kpis[dist_col])
+        avg_fuel = _sql_fuel_mean(fuel_model, dist_where)
+    else:
+        # In-memory range KPIs: prefix sums in distance order (O(log n) per rerun)
+        fuel_all = estimate_fuel(fuel_model)
+        avg_distance = range_sums(dist_col, dist_col).mean(*dist_range)
+        avg_fuel = range_sums(dist_col, f"fuel.{fuel_model}", values=fuel_all).mean(*dist_range) or 0.0
 
     kpis = [
         ("Total Flights", f"{total_flights_all:,}", "Entire dataset"),
         ("Flights in Filter", f"{total_flights_filtered:,}", "After distance filter"),
         ("Avg Distance (km)", f"{avg_distance:.1f}", "Filtered subset"),
-        ("Avg Fuel (kg)", f"{avg_fuel:.1f}", "Simulated"),
+        ("Avg Fuel (kg)", f"{avg_fuel:.1f}", f"Simulated · {FUEL_MODELS[fuel_model].label}"),
     ]
     _kpi_cards(st, kpis)
 
+    # Exact delay percentiles for the distance range (stored order statistics, or SQLite)
+    if dep_delay_col:
+        qs = [p / 100 for p in DELAY_PERCENTILES]
+        if sqlite:
+            dep_q = sql_quantiles(dep_delay_col, qs, where=dist_where)
+            arr_q = sql_quantiles(arr_delay_col, qs, where=dist_where) if arr_delay_col else None
+        else:
+            dep_q = range_quantiles(dist_col, dep_delay_col).quantiles(*dist_range, qs)
+            arr_q = range_quantiles(dist_col, arr_delay_col).quantiles(*dist_range, qs) if arr_delay_col else None
+        _render_html(st, '<div class="hint" style="margin-top:12px;">Departure delay percentiles (filtered subset).</div>')
+        _kpi_cards(
+            st,
+            [
+                (
+                    f"Departure Delay p{p}",
+                    f"{dep_q[i]:.0f} min",
+                    f"Arrival p{p}: {arr_q[i]:.0f} min" if arr_q is not None else "",
+                )
+                for i, p in enumerate(DELAY_PERCENTILES)
+            ],
+        )
+
     st.divider()
 
     # -------------------------------
@@ -297,8 +407,17 @@ def run_flight_performance_ui():
     _render_html(st, '<div class="section-title">📈 Flight Distance Distribution</div>')
     _render_html(st, '<div class="hint">Histogram of flight distance for the selected range.</div>')
 
+    if sqlite:
+        # binned by the engine over the filtered rows
+        edges = np.linspace(*sql_extent(dist_col, where=dist_where), bins + 1)
+        dist_counts = sql_histogram(dist_col, edges, where=dist_where)["count"].to_numpy()
+    else:
+        # re-binned from the cached per-value histogram (no row scan)
+        dist_hist = value_histogram(dist_col).between(*dist_range)
+        edges = np.linspace(dist_hist.minimum, dist_hist.maximum, bins + 1)
+        dist_counts = dist_hist.counts(edges)
     fig1, ax1 = plt.subplots()
-    ax1.hist(df_f["_dist_num"], bins=bins)
+    ax1.hist(edges[:-1], bins=edges, weights=dist_counts)
     ax1.set_xlabel("Flight Distance (km)")
     ax1.set_ylabel("Number of Flights")
     st.pyplot(fig1, clear_figure=True)
@@ -309,14 +428,28 @@ def run_flight_performance_ui():
     # DELAY ANALYSIS
     # -------------------------------
     _render_html(st, '<div class="section-title">⏱ Arrival Delay vs Flight Distance</div>')
-    _render_html(st, '<div class="hint">Scatter plot (sampled for performance).</div>')
-
-    sample_df = df_f.sample(n=min(sample_n, len(df_f)), random_state=42)
-
-    if arr_delay_col:
-        arr = pd.to_numeric(sample_df[arr_delay_col], errors="coerce")
+    if density:
+        _render_html(st, '<div class="hint">Density of all filtered flights (log-scaled counts per cell).</div>')
+    else:
+        _render_html(st, '<div class="hint">Scatter plot (sampled for performance).</div>')
+        if sqlite:
+            # a fixed pseudo-random sample of the filtered rows, read from the database
+            fuel_cols = (schema.get(f) for f in FUEL_MODELS[fuel_model].fields)
+            sample = sql_rows([c for c in (dist_col, arr_delay_col, *fuel_cols) if c], where=dist_where, limit=sample_n)
+            sample_rows = sample.index.to_numpy()
+            sample_dist = sample[dist_col].to_numpy(dtype=float)
+            sample_arr = sample[arr_delay_col].to_numpy(dtype=float) if arr_delay_col else None
+        else:
+            # first sample_n rows of the stored stratified permutation that fall in range
+            sample_rows = sample_permutation(dist_col).take(*dist_range, sample_n)
+            sample_dist = numeric_column(dist_col).values[sample_rows]
+            sample_arr = numeric_column(arr_delay_col).values[sample_rows] if arr_delay_col else None
+
+    if arr_delay_col and density:
+        _density_plot(st, dist_f, numeric_column(arr_delay_col).values[rows], "Flight Distance (km)", "Arrival Delay (minutes)")
+    elif arr_delay_col:
         fig2, ax2 = plt.subplots()
-        ax2.scatter(sample_df["_dist_num"], arr, alpha=0.25)
+        ax2.scatter(sample_dist, sample_arr, alpha=0.25)
         ax2.set_xlabel("Flight Distance (km)")
         ax2.set_ylabel("Arrival Delay (minutes)")
         st.pyplot(fig2, clear_figure=True)
@@ -331,12 +464,15 @@ def run_flight_performance_ui():
     _render_html(st, '<div class="section-title">⛽ Estimated Fuel vs Flight Distance</div>')
     _render_html(st, '<div class="hint">Fuel is simulated from distance (academic estimation).</div>')
 
-    fuel = pd.to_numeric(sample_df["Estimated Fuel Consumption (kg)"], errors="coerce")
-    fig3, ax3 = plt.subplots()
-    ax3.scatter(sample_df["_dist_num"], fuel, alpha=0.30)
-    ax3.set_xlabel("Flight Distance (km)")
-    ax3.set_ylabel("Estimated Fuel Consumption (kg)")
-    st.pyplot(fig3, clear_figure=True)
+    if density:
+        _density_plot(st, dist_f, fuel_all[rows], "Flight Distance (km)", "Estimated Fuel Consumption (kg)")
+    else:
+        fuel = estimate_fuel(fuel_model, frame=sample) if sqlite else estimate_fuel(fuel_model, rows=sample_rows)
+        fig3, ax3 = plt.subplots()
+        ax3.scatter(sample_dist, fuel, alpha=0.30)
+        ax3.set_xlabel("Flight Distance (km)")
+        ax3.set_ylabel("Estimated Fuel Consumption (kg)")
+        st.pyplot(fig3, clear_figure=True)
 
     st.divider()
 
@@ -346,11 +482,11 @@ def run_flight_performance_ui():
     _render_html(st, '<div class="section-title">👨‍✈️ Crew Service Performance</div>')
     _render_html(st, '<div class="hint">Average rating (1–5) across available service columns.</div>')
 
-    crew_cols = ["On-board service", "Inflight service", "Checkin service"]
-    available = [c for c in crew_cols if c in df_f.columns]
-
     if available:
-        crew_avg = df_f[available].apply(pd.to_numeric, errors="coerce").mean().sort_values()
+        if sql_kpis is not None:
+            crew_avg = sql_kpis[available].astype(float).sort_values()
+        else:
+            crew_avg = pd.Series({c: range_sums(dist_col, c).mean(*dist_range) for c in available}, dtype=float).sort_values()
 
         fig4, ax4 = plt.subplots()
         crew_avg.plot(kind="barh", ax=ax4)
@@ -359,6 +495,19 @@ def run_flight_performance_ui():
     else:
         st.warning("Crew service columns not found in dataset.")
 
+    st.divider()
+
+    # -------------------------------
+    # CORRELATIONS
+    # -------------------------------
+    _render_html(st, '<div class="section-title">🔗 Correlation Matrix</div>')
+    _render_html(
+        st,
+        '<div class="hint">Pearson correlation of distance, delays and service ratings '
+        "(entire dataset, single streaming pass).</div>",
+    )
+    _correlation_heatmap(st, correlation_matrix())
+
 
 # ============================================================
 # CLI VERSION
@@ -378,37 +527,40 @@ def run_flight_performance_cli():
 
     total_flights_all = int(len(df))
 
-    dist_col = _first_existing_col(df, ["Flight Distance", "FlightDistance", "Distance", "flight_distance"])
-    dep_delay_col = _first_existing_col(df, ["Departure Delay in Minutes", "DepartureDelay", "DepDelay"])
-    arr_delay_col = _first_existing_col(df, ["Arrival Delay in Minutes", "ArrivalDelay", "ArrDelay"])
+    schema = schema_map()
+    dist_col = schema.get("distance")
+    dep_delay_col = schema.get("dep_delay")
+    arr_delay_col = schema.get("arr_delay")
 
-    dist = pd.to_numeric(df[dist_col], errors="coerce")
-    fuel = pd.to_numeric(df["Estimated Fuel Consumption (kg)"], errors="coerce")
+    fuel = estimate_fuel(DEFAULT_FUEL_MODEL)
 
+    # maintained aggregates: refreshed incrementally when the feed appends rows
     print(f"✈️ Total Flights        : {total_flights_all:,}")
-    print(f"📏 Avg Distance (km)    : {float(dist.mean()):.1f}")
+    print(f"📏 Avg Distance (km)    : {column_stats(dist_col).mean:.1f}")
+
+    qs = [p / 100 for p in DELAY_PERCENTILES]
+    labels = "/".join(f"p{p}" for p in DELAY_PERCENTILES)
 
     if dep_delay_col:
-        dep = pd.to_numeric(df[dep_delay_col], errors="coerce")
-        print(f"⏱ Avg Departure Delay  : {float(dep.mean()):.1f} min")
+        print(f"⏱ Avg Departure Delay  : {column_stats(dep_delay_col).mean:.1f} min")
+        print(f"   Departure {labels}: " + " / ".join(f"{v:.0f}" for v in quantiles(dep_delay_col, qs)) + " min")
     else:
         print("⏱ Avg Departure Delay  : N/A (column missing)")
 
     if arr_delay_col:
-        arr = pd.to_numeric(df[arr_delay_col], errors="coerce")
-        print(f"🛬 Avg Arrival Delay    : {float(arr.mean()):.1f} min")
+        print(f"🛬 Avg Arrival Delay    : {column_stats(arr_delay_col).mean:.1f} min")
+        print(f"   Arrival   {labels}: " + " / ".join(f"{v:.0f}" for v in quantiles(arr_delay_col, qs)) + " min")
     else:
         print("🛬 Avg Arrival Delay    : N/A (column missing)")
 
-    print(f"⛽ Avg Fuel Consumption : {float(fuel.mean()):.1f} kg")
+    print(f"⛽ Avg Fuel Consumption : {float(np.nanmean(fuel)):.1f} kg")
 
-    crew_cols = ["On-board service", "Inflight service", "Checkin service"]
-    available = [c for c in crew_cols if c in df.columns]
+    available = [c for c in (schema.get(f) for f in CREW_FIELDS) if c]
     if available:
         print("\n👨‍✈️ Crew Service Ratings:")
         for col in available:
-            s = pd.to_numeric(df[col], errors="coerce")
-            print(f" - {col}: {float(s.mean()):.2f}" if s.notna().any() else f" - {col}: N/A")
+            avg = column_stats(col).mean
+            print(f" - {col}: {avg:.2f}" if avg is not None else f" - {col}: N/A")
 
     print("\n✔ Flight Performance CLI completed.")
     input("\nPress ENTER to return to main menu...")
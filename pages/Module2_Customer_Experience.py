@@ -11,6 +11,11 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+from services.schema_service import SERVICE_RATING_FIELDS, resolve_schema
+
+# Logical fields this module reads (resolved by services.schema_service)
+CUSTOMER_COLUMNS = ["satisfaction", "distance", *SERVICE_RATING_FIELDS]
+
 
 # ============================================================
 # Helpers
@@ -34,7 +39,7 @@ def _load_data() -> pd.DataFrame | None:
     try:
         from services.data_service import load_data
 
-        df = load_data()
+        df = load_data(columns=CUSTOMER_COLUMNS)
         if df is not None and not df.empty:
             return df
     except Exception:
@@ -48,18 +53,6 @@ def _load_data() -> pd.DataFrame | None:
         return None
 
 
-def _first_existing_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
-    """Return the first matching column name in df from candidates (case-safe)."""
-    cols_lower = {c.lower(): c for c in df.columns}
-    for cand in candidates:
-        if cand in df.columns:
-            return cand
-        cl = cand.lower()
-        if cl in cols_lower:
-            return cols_lower[cl]
-    return None
-
-
 def _render_html(st, html: str) -> None:
     """
     Streamlit Markdown turns lines with 4+ leading spaces into CODE.
@@ -180,18 +173,9 @@ def _kpi_cards(st, items: list[tuple[str, str, str]]) -> None:
     _render_html(st, f'<div class="kpiGrid">{"".join(cards)}</div>')
 
 
-def _standardize_satisfaction(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Creates a robust satisfaction_score (1–5) from whatever satisfaction labels exist.
-    Falls back to neutral=3.
-    """
-    sat_col = _first_existing_col(df, ["satisfaction", "Satisfaction", "satisfied"])
-    if sat_col is None:
-        df["satisfaction_score"] = 3.0
-        df["satisfaction_label"] = "neutral"
-        return df
-
-    raw = df[sat_col].astype(str).str.strip().str.lower()
+def _satisfaction_scores(sat: pd.Series) -> pd.DataFrame:
+    """satisfaction_score (1–5) and satisfaction_label for one satisfaction column."""
+    raw = sat.astype(str).str.strip().str.lower()
 
     # Map common labels
     satisfaction_map = {
@@ -211,9 +195,7 @@ def _standardize_satisfaction(df: pd.DataFrame) -> pd.DataFrame:
     score = score.fillna(numeric)
 
     # Clamp / fill
-    score = score.clip(lower=1, upper=5).fillna(3)
-
-    df["satisfaction_score"] = score.astype(float)
+    score = score.clip(lower=1, upper=5).fillna(3).astype(float)
 
     # Create a label too (nice for summaries)
     def label_from_score(x: float) -> str:
@@ -223,14 +205,155 @@ def _standardize_satisfaction(df: pd.DataFrame) -> pd.DataFrame:
             return "neutral"
         return "satisfied"
 
-    df["satisfaction_label"] = df["satisfaction_score"].apply(label_from_score)
+    return pd.DataFrame(
+        {
+            "satisfaction_score": score.to_numpy(),
+            "satisfaction_label": pd.Categorical(score.apply(label_from_score)),
+        }
+    )
+
+
+def _standardize_satisfaction(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Creates a robust satisfaction_score (1–5) from whatever satisfaction labels exist.
+    Falls back to neutral=3. Scores for the full dataset come from the artifact store.
+    """
+    sat_col = resolve_schema(df.columns).get("satisfaction")
+    if sat_col is None:
+        df["satisfaction_score"] = 3.0
+        df["satisfaction_label"] = "neutral"
+        return df
+
+    scores = None
+    full_dataset = isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+    if full_dataset:
+        try:
+            from services.artifact_service import cached_artifact
+
+            scores = cached_artifact(
+                "module2.satisfaction_score", {"column": sat_col}, lambda: _satisfaction_scores(df[sat_col])
+            )
+        except Exception:
+            scores = None
+    if scores is None or len(scores) != len(df):
+        scores = _satisfaction_scores(df[sat_col])
+
+    df["satisfaction_score"] = scores["satisfaction_score"].to_numpy()
+    df["satisfaction_label"] = scores["satisfaction_label"].to_numpy()
     return df
 
 
+def _shared_numeric(df: pd.DataFrame, col: str):
+    """
+    Pre-coerced column from data_service (positions = dataset rows), or
+    None when unavailable / when df's index is not dataset row numbers.
+    """
+    try:
+        from services.data_service import numeric_column
+
+        num = numeric_column(col)
+    except Exception:
+        return None
+    if num is None or len(df) == 0 or not pd.api.types.is_integer_dtype(df.index.dtype):
+        return None
+    if df.index.min() < 0 or df.index.max() >= len(num):
+        return None
+    return num
+
+
 def _safe_numeric_series(df: pd.DataFrame, col: str) -> pd.Series:
+    num = _shared_numeric(df, col)
+    if num is not None:
+        return pd.Series(num.values[df.index.to_numpy()], index=df.index, name=col)
     return pd.to_numeric(df[col], errors="coerce")
 
 
+def _numeric_mean(df: pd.DataFrame, col: str) -> float:
+    num = _shared_numeric(df, col)
+    if num is not None:
+        avg = num.mean(df.index.to_numpy())
+        return float("nan") if avg is None else avg
+    return float(pd.to_numeric(df[col], errors="coerce").mean())
+
+
+def _distance_rows(df: pd.DataFrame, dist_col: str, dist_range) -> np.ndarray | None:
+    """
+    Sorted row numbers with distance in ``dist_range``, taken from the
+    shared sorted distance index, or None when df is not the shared
+    dataset (fallback CSV read).
+    """
+    num = _shared_numeric(df, dist_col)
+    if num is None or not df.index.equals(pd.RangeIndex(len(num))):
+        return None
+    try:
+        from services.data_service import sorted_index
+
+        index = sorted_index(dist_col)
+    except Exception:
+        return None
+    if index is None:
+        return None
+    return np.sort(index.rows_between(*dist_range))
+
+
+def _score_histogram(df: pd.DataFrame):
+    """Cached per-value histogram of the full dataset's satisfaction_score, or None for other frames."""
+    if not (isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1):
+        return None
+    try:
+        from services.data_service import value_histogram
+
+        return value_histogram("module2.satisfaction_score", values=df["satisfaction_score"].to_numpy())
+    except Exception:
+        return None
+
+
+def _range_means(dist_col: str, dist_range, columns: list[str]) -> pd.Series | None:
+    """Means of ``columns`` over a distance range from shared prefix sums, or None if unavailable."""
+    try:
+        from services.data_service import range_sums
+
+        sums = {c: range_sums(dist_col, c) for c in columns}
+    except Exception:
+        return None
+    if any(v is None for v in sums.values()):
+        return None
+    return pd.Series({c: v.mean(*dist_range) for c, v in sums.items()}, dtype=float)
+
+
+def _sql_schema():
+    """
+    The dataset schema when the SQLite backend answers this page's
+    queries, or None when it is off (or satisfaction is missing).
+    """
+    try:
+        from services.data_service import schema_map
+        from services.sqlite_service import storage_backend
+
+        if storage_backend() != "sqlite":
+            return None
+        schema = schema_map()
+    except Exception:
+        return None
+    return schema if schema.get("satisfaction") is not None else None
+
+
+def _sql_filters(schema, sat_min: int, dist_range) -> dict:
+    """
+    The page filters as sql_aggregate() conditions. The score filter
+    becomes the set of raw satisfaction labels whose standardized score
+    passes it.
+    """
+    from services.sqlite_service import sql_aggregate
+
+    labels = pd.Series(sql_aggregate(group_by="satisfaction").index, dtype=object)
+    scores = _satisfaction_scores(labels)["satisfaction_score"].to_numpy()
+    where = {"satisfaction": [None if pd.isna(v) else v for v in labels[scores >= sat_min]]}
+    if dist_range is not None:
+        where["distance"] = tuple(dist_range)
+    return where
+
+
 # ============================================================
 # STREAMLIT UI
 # ============================================================
@@ -253,19 +376,33 @@ def run_customer_experience_ui():
         """,
     )
 
-    df = _load_data()
-    if df is None or df.empty:
-        st.error("❌ Unable to load dataset (expected assets/train.csv).")
-        st.stop()
+    # SQLite backend: KPIs and charts come from counts grouped by the
+    # engine; the passenger frame is never loaded.
+    schema = _sql_schema()
+    sql_mode = schema is not None
+    if sql_mode:
+        from services.sqlite_service import sql_aggregate, sql_extent, sql_histogram
 
-    df = _standardize_satisfaction(df)
-
-    # Detect distance column (for filtering)
-    dist_col = _first_existing_col(df, ["Flight Distance", "FlightDistance", "Distance", "flight_distance"])
-    if dist_col:
-        df["_dist_num"] = _safe_numeric_series(df, dist_col)
+        dist_col = schema.get("distance")
+        extent = sql_extent(dist_col) if dist_col else None
     else:
-        df["_dist_num"] = np.nan
+        df = _load_data()
+        if df is None or df.empty:
+            st.error("❌ Unable to load dataset (expected assets/train.csv).")
+            st.stop()
+
+        df = _standardize_satisfaction(df)
+
+        # Detect distance column (for filtering)
+        schema = resolve_schema(df.columns)
+        dist_col = schema.get("distance")
+        if dist_col:
+            df["_dist_num"] = _safe_numeric_series(df, dist_col)
+        else:
+            df["_dist_num"] = np.nan
+        extent = None
+        if dist_col and df["_dist_num"].notna().any():
+            extent = (float(df["_dist_num"].min()), float(df["_dist_num"].max()))
 
     # ------------------------------------------------------------
     # Filters
@@ -279,9 +416,8 @@ def run_customer_experience_ui():
 
     with c2:
         # Optional distance filter
-        if dist_col and df["_dist_num"].notna().any():
-            dmin = float(df["_dist_num"].min())
-            dmax = float(df["_dist_num"].max())
+        if extent is not None:
+            dmin, dmax = extent
             dist_range = st.slider("Flight distance range (km)", dmin, dmax, (dmin, dmax))
         else:
             dist_range = None
@@ -290,20 +426,40 @@ def run_customer_experience_ui():
     with c3:
         bins = st.slider("Histogram bins", 5, 25, 10, step=1)
 
-    df_f = df[df["satisfaction_score"] >= sat_min].copy()
-    if dist_range is not None:
-        df_f = df_f[df_f["_dist_num"].between(dist_range[0], dist_range[1], inclusive="both")]
+    rows = None
+    if sql_mode:
+        sql_where = _sql_filters(schema, sat_min, dist_range)
+        by_label = sql_aggregate(where=sql_where, group_by="satisfaction")
+        empty = int(by_label["count"].sum()) == 0
+    else:
+        rows = _distance_rows(df, dist_col, dist_range) if dist_range is not None else None
+        if rows is not None:
+            rows = rows[df["satisfaction_score"].to_numpy()[rows] >= sat_min]
+            df_f = df.take(rows)
+        else:
+            df_f = df[df["satisfaction_score"] >= sat_min].copy()
+            if dist_range is not None:
+                df_f = df_f[df_f["_dist_num"].between(dist_range[0], dist_range[1], inclusive="both")]
+        empty = df_f.empty
 
-    if df_f.empty:
+    if empty:
         st.warning("No records match the selected filters.")
         st.stop()
 
     # ------------------------------------------------------------
     # KPI Summary
     # ------------------------------------------------------------
-    avg_score = float(df_f["satisfaction_score"].mean())
-    total_passengers = int(len(df_f))
-    satisfied_rate = float((df_f["satisfaction_label"] == "satisfied").mean() * 100.0)
+    if sql_mode:
+        label_scores = _satisfaction_scores(pd.Series(by_label.index, dtype=object))
+        counts = by_label["count"].to_numpy()
+        total_passengers = int(counts.sum())
+        avg_score = float((counts * label_scores["satisfaction_score"].to_numpy()).sum() / total_passengers)
+        satisfied = (label_scores["satisfaction_label"] == "satisfied").to_numpy()
+        satisfied_rate = float(counts[satisfied].sum() / total_passengers * 100.0)
+    else:
+        avg_score = float(df_f["satisfaction_score"].mean())
+        total_passengers = int(len(df_f))
+        satisfied_rate = float((df_f["satisfaction_label"] == "satisfied").mean() * 100.0)
 
     _kpi_cards(
         st,
@@ -323,8 +479,18 @@ def run_customer_experience_ui():
     _render_html(st, '<div class="section-title">📊 Satisfaction Score Distribution</div>')
     _render_html(st, '<div class="hint">Histogram of satisfaction scores (1–5) for filtered passengers.</div>')
 
+    edges = np.arange(0.5, 5.6, (5 / bins))
+    full_distance = dist_range is None or (dist_range[0] <= dmin and dist_range[1] >= dmax)
+    score_hist = _score_histogram(df) if full_distance and not sql_mode else None
     fig1, ax1 = plt.subplots(figsize=(8, 4))
-    ax1.hist(df_f["satisfaction_score"], bins=np.arange(0.5, 5.6, (5 / bins)))
+    if sql_mode:
+        # one score per raw label, weighted by its filtered count
+        ax1.hist(label_scores["satisfaction_score"], bins=edges, weights=counts)
+    elif score_hist is not None:
+        # only the score filter is active: re-bin the cached score histogram
+        ax1.hist(edges[:-1], bins=edges, weights=score_hist.between(sat_min, np.inf).counts(edges))
+    else:
+        ax1.hist(df_f["satisfaction_score"], bins=edges)
     ax1.set_xlabel("Satisfaction Score (1–5)")
     ax1.set_ylabel("Passenger Count")
     ax1.set_title("Distribution of Satisfaction Scores")
@@ -341,7 +507,25 @@ def run_customer_experience_ui():
     _render_html(st, '<div class="section-title">🧭 Satisfaction vs Flight Distance</div>')
     _render_html(st, '<div class="hint">How satisfaction varies with distance (binned mean delay-style trend).</div>')
 
-    if dist_col and df_f["_dist_num"].notna().any():
+    trend = None
+    if sql_mode and dist_col:
+        # same 8 buckets as pd.cut, counted per raw label by the engine
+        filtered_extent = sql_extent(dist_col, where=sql_where)
+        if filtered_extent is not None and filtered_extent[1] > filtered_extent[0]:
+            buckets = pd.cut(pd.Series(filtered_extent), bins=8).cat.categories
+            by_bucket = sql_histogram(
+                dist_col, np.linspace(*filtered_extent, 9), where=sql_where, group_by="satisfaction", right=True
+            )
+            bucket_scores = _satisfaction_scores(pd.Series(by_bucket.columns, dtype=object))["satisfaction_score"]
+            bucket_counts = by_bucket.to_numpy().sum(axis=1)
+            observed = bucket_counts > 0
+            trend = pd.DataFrame(
+                {
+                    "distance_bucket": buckets.astype(str)[observed],
+                    "satisfaction_score": (by_bucket.to_numpy() @ bucket_scores.to_numpy())[observed] / bucket_counts[observed],
+                }
+            )
+    elif dist_col and df_f["_dist_num"].notna().any():
         # Bin distance and plot mean satisfaction per bin (cleaner than huge scatter)
         tmp = df_f[["_dist_num", "satisfaction_score"]].dropna()
         if tmp["_dist_num"].nunique() > 2:
@@ -349,6 +533,8 @@ def run_customer_experience_ui():
             trend = tmp.groupby("distance_bucket", observed=True)["satisfaction_score"].mean().reset_index()
             trend["distance_bucket"] = trend["distance_bucket"].astype(str)
 
+    if dist_col and (sql_mode or df_f["_dist_num"].notna().any()):
+        if trend is not None:
             fig2, ax2 = plt.subplots(figsize=(10, 4))
             ax2.plot(trend["distance_bucket"], trend["satisfaction_score"], marker="o")
             ax2.set_xlabel("Flight Distance Bucket (km)")
@@ -372,29 +558,20 @@ def run_customer_experience_ui():
     _render_html(st, '<div class="section-title">🔥 Average Inflight Service Ratings</div>')
     _render_html(st, '<div class="hint">Average (1–5) across service attributes that exist in the dataset.</div>')
 
-    service_cols = [
-        "Inflight wifi service",
-        "Departure/Arrival time convenient",
-        "Ease of Online booking",
-        "Gate location",
-        "Food and drink",
-        "Online boarding",
-        "Seat comfort",
-        "Inflight entertainment",
-        "On-board service",
-        "Leg room service",
-        "Baggage handling",
-        "Checkin service",
-        "Inflight service",
-        "Cleanliness",
-    ]
-
-    available_services = [c for c in service_cols if c in df_f.columns]
+    available_services = schema.resolve(SERVICE_RATING_FIELDS)
     if not available_services:
         st.warning("No service rating columns found in dataset.")
         return
 
-    scores = df_f[available_services].apply(pd.to_numeric, errors="coerce").mean().sort_values()
+    scores = None
+    if sql_mode:
+        scores = sql_aggregate(available_services, where=sql_where).iloc[0][available_services].astype(float)
+    elif rows is not None and sat_min <= 1:
+        # distance is the only active filter: O(log n) prefix-sum lookups
+        scores = _range_means(dist_col, dist_range, available_services)
+    if scores is None:
+        scores = pd.Series({c: _numeric_mean(df_f, c) for c in available_services}, dtype=float)
+    scores = scores.sort_values()
 
     fig3, ax3 = plt.subplots(figsize=(10, 6))
     ax3.barh(scores.index.astype(str), scores.values)
@@ -406,6 +583,18 @@ def run_customer_experience_ui():
     ax3.spines["right"].set_visible(False)
     st.pyplot(fig3, clear_figure=True)
 
+    # Shared single-pass correlation state (same one Module 1 draws)
+    try:
+        from services.data_service import correlation_matrix
+
+        corr = correlation_matrix()
+        corr = corr.loc[[c for c in corr.index if c in available_services], :]
+    except Exception:
+        corr = None
+    if corr is not None and not corr.empty:
+        with st.expander("Service rating correlations (entire dataset)"):
+            st.dataframe(corr.round(2), use_container_width=True)
+
 
 # ============================================================
 # CLI Version
@@ -151,18 +151,6 @@ def _kpi_card(st, title: str, value: str, badge: str = ""):
     )
 
 
-def _first_existing_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
-    """Return the first matching column name in df from candidates (case-safe)."""
-    cols_lower = {c.lower(): c for c in df.columns}
-    for cand in candidates:
-        if cand in df.columns:
-            return cand
-        cl = cand.lower()
-        if cl in cols_lower:
-            return cols_lower[cl]
-    return None
-
-
 def simulate_delay_monte_carlo(mean_delay: float, std_delay: float, n: int, crisis_multiplier: float) -> np.ndarray:
     delays = np.random.normal(loc=mean_delay, scale=std_delay, size=n)
     delays = np.clip(delays, 0, None)
@@ -222,40 +210,42 @@ def _delay_histogram_df(delays: np.ndarray) -> pd.DataFrame:
     return df_hist
 
 
-def _distance_delay_trend_df(df: pd.DataFrame, dist_col: str, delay_col: str) -> pd.DataFrame:
+def _distance_delay_trend_df(dist_col: str, delay_col: str) -> pd.DataFrame:
     """
     Build a clean trend line: mean delay by distance bucket.
     Ensures the x-axis labels are readable (string buckets) for st.line_chart.
+    Uses the data layer's maintained bucket means, so appended rows only
+    update the buckets instead of re-grouping the whole dataset.
     """
-    dist = pd.to_numeric(df[dist_col], errors="coerce")
-    delay = pd.to_numeric(df[delay_col], errors="coerce")
-    tmp = pd.DataFrame({"distance": dist, "delay": delay}).dropna()
+    from services.data_service import bucket_means, column_stats
+
+    dist = column_stats(dist_col)
 
     # Guard against weird data
-    if tmp.empty or tmp["distance"].nunique() < 2:
+    if dist is None or not dist.count or dist.minimum == dist.maximum:
         return pd.DataFrame()
 
-    # 8 buckets across range
-    tmp["distance_bucket"] = pd.cut(tmp["distance"], bins=8)
+    # 8 buckets across range (same edges as pd.cut(bins=8))
+    edges = np.linspace(dist.minimum, dist.maximum, 9)
+    edges[0] -= (dist.maximum - dist.minimum) * 0.001
 
-    trend = (
-        tmp.groupby("distance_bucket", observed=True)["delay"]
-        .mean()
-        .reset_index()
-    )
+    buckets = bucket_means(dist_col, delay_col, edges)
+    observed = buckets.counts > 0
 
     # Make bucket labels readable on chart axis
-    trend["distance_bucket"] = trend["distance_bucket"].astype(str)
+    labels = pd.cut(edges[1:], bins=edges).categories.astype(str)
 
     # st.line_chart likes an index
-    trend = trend.set_index("distance_bucket")
-    trend.columns = ["Mean Delay (min)"]
+    trend = pd.DataFrame(
+        {"Mean Delay (min)": buckets.means()[observed]},
+        index=pd.Index(np.asarray(labels)[observed], name="distance_bucket"),
+    )
     return trend
 
 
 def run_streamlit():
     import streamlit as st
-    from services.data_service import load_data
+    from services.data_service import column_stats, schema_map
 
     _safe_apply_global_styles()
     _inject_module_css()
@@ -267,28 +257,21 @@ def run_streamlit():
         unsafe_allow_html=True,
     )
 
-    df = load_data()
-
-    delay_col = _first_existing_col(
-        df,
-        ["Departure Delay in Minutes", "DepartureDelay", "DepDelay", "departure_delay", "dep_delay"],
-    )
-    dist_col = _first_existing_col(
-        df,
-        ["Flight Distance", "FlightDistance", "Distance", "flight_distance"],
-    )
+    schema = schema_map()
+    delay_col = schema.get("dep_delay")
+    dist_col = schema.get("distance")
 
     if delay_col is None:
         st.error("Dataset does not contain a departure delay column (expected 'Departure Delay in Minutes' or similar).")
         return
 
-    delay_series = pd.to_numeric(df[delay_col], errors="coerce").dropna()
-    if delay_series.empty:
+    delay_stats = column_stats(delay_col)
+    if not delay_stats.count:
         st.error("Delay column exists but contains no numeric values.")
         return
 
-    mean_delay = float(delay_series.mean())
-    std_delay = float(delay_series.std())
+    mean_delay = float(delay_stats.mean)
+    std_delay = delay_stats.std(ddof=1) or 0.0
     if not (std_delay > 0):
         std_delay = 10.0
 
@@ -353,7 +336,7 @@ def run_streamlit():
         st.info("No distance column found. Skipping distance context chart.")
         return
 
-    trend = _distance_delay_trend_df(df, dist_col, delay_col)
+    trend = _distance_delay_trend_df(dist_col, delay_col)
     if trend.empty:
         st.info("Not enough valid distance/delay data to build the distance trend chart.")
         return
@@ -367,30 +350,28 @@ def run_streamlit():
 def run_risk_simulation_cli():
     """Command-line interface for Risk & Scenario Simulation (summary only)."""
 
-    from services.data_service import load_data
+    from services.data_service import column_stats, schema_map
 
     print("\n=======================================")
     print("  RISK & SCENARIO SIMULATION (CLI)     ")
     print("=======================================\n")
 
-    df = load_data()
-
-    delay_col = _first_existing_col(
-        df, ["Departure Delay in Minutes", "DepartureDelay", "DepDelay"]
-    )
+    delay_col = schema_map().get("dep_delay")
     if delay_col is None:
         print("❌ ERROR: Could not find a departure delay column.")
         input("Press ENTER to return...")
         return
 
-    delay_series = pd.to_numeric(df[delay_col], errors="coerce").dropna()
-    if delay_series.empty:
+    delay_stats = column_stats(delay_col)
+    if not delay_stats.count:
         print("❌ ERROR: Delay column exists but has no numeric values.")
         input("Press ENTER to return...")
         return
 
-    mean_delay = float(delay_series.mean())
-    std_delay = float(delay_series.std()) if delay_series.std() > 0 else 10.0
+    mean_delay = float(delay_stats.mean)
+    std_delay = delay_stats.std(ddof=1) or 0.0
+    if not (std_delay > 0):
+        std_delay = 10.0
 
     # Fixed CLI assumptions (documented)
     sims = 12000
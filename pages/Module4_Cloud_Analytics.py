@@ -7,13 +7,13 @@
 # This module demonstrates cloud-style analytics patterns using the
 # project dataset (train.csv). It focuses on practical concepts:
 # caching, batch processing, and a lightweight streaming simulation.
+# Batch processing streams the file through data_service.iter_batches,
+# so its memory use does not grow with the dataset.
 # ============================================================
 
 from __future__ import annotations
 
 import time
-from typing import Optional
-
 import numpy as np
 import pandas as pd
 
@@ -31,17 +31,6 @@ def _safe_apply_global_styles() -> bool:
         return False
 
 
-def _first_existing_col(df: pd.DataFrame, candidates: list[str]) -> Optional[str]:
-    cols_lower = {c.lower(): c for c in df.columns}
-    for cand in candidates:
-        if cand in df.columns:
-            return cand
-        cl = cand.lower()
-        if cl in cols_lower:
-            return cols_lower[cl]
-    return None
-
-
 def _inject_module_css() -> None:
     import streamlit as st
 
@@ -174,46 +163,112 @@ def _df_memory_bytes(df: pd.DataFrame) -> int:
     return int(df.memory_usage(deep=True).sum())
 
 
+def _satisfied_flags(v: pd.Series) -> pd.Series:
+    """Label match used for the satisfaction rate; Arrow strings skip the object round-trip."""
+    if isinstance(v.dtype, pd.StringDtype):
+        return v.str.lower().str.contains("satisf")
+    return v.astype(str).str.lower().str.contains("satisf")
+
+
+_backend_comparisons: dict = {}  # file fingerprint -> measured numbers only
+
+
+def _dtype_backend_comparison() -> dict | None:
+    """
+    Memory and latency of the default NumPy-backed frame vs a temporary
+    Arrow-backed copy (to_arrow()), measured once per dataset version.
+    None when pyarrow is not installed.
+    """
+    from services.data_service import arrow_available, file_fingerprint, load_data, schema_map, to_arrow
+
+    if not arrow_available():
+        return None
+    fp = file_fingerprint()
+    if fp in _backend_comparisons:
+        return _backend_comparisons[fp]
+    sat_col = schema_map().get("satisfaction")
+    out = {}
+    for backend in ("numpy", "pyarrow"):
+        t0 = time.perf_counter()
+        df = load_data()
+        if backend == "pyarrow":
+            # the Arrow copy is dropped after measuring; only the numbers are kept
+            df = to_arrow(df)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+        t0 = time.perf_counter()
+        mem = _df_memory_bytes(df)
+        mem_ms = (time.perf_counter() - t0) * 1000.0
+        scan_ms = None
+        if sat_col:
+            t0 = time.perf_counter()
+            _satisfied_flags(df[sat_col]).mean()
+            scan_ms = (time.perf_counter() - t0) * 1000.0
+        out[backend] = {"load_ms": load_ms, "memory_mb": _bytes_to_mb(mem), "memory_ms": mem_ms, "scan_ms": scan_ms}
+    _backend_comparisons.clear()
+    _backend_comparisons[fp] = out
+    return out
+
+
 # -----------------------------
 # Cloud-style patterns
 # -----------------------------
-def _batch_aggregate(df: pd.DataFrame, batch_size: int) -> pd.DataFrame:
+BATCH_COLUMNS = [
+    "Batch",
+    "Rows",
+    "Missing Cells",
+    "Avg Departure Delay",
+    "Avg Flight Distance",
+    "Satisfaction Rate %",
+]
+
+
+def _batch_aggregate(batch_size: int) -> pd.DataFrame:
     """
     Simple batch processing pattern:
-    - process the dataset in chunks
+    - stream the dataset in chunks (data_service.iter_batches)
     - emit per-batch KPIs
+    Only one batch is in memory at a time, whatever the file size.
+    Missing cells come from the dataset's quality profile (null-bitmap
+    popcounts), so only the KPI columns are streamed here; a cold
+    profile is built from batches as well.
+    The overall mean departure delay is left in ``attrs["avg_departure_delay"]``.
     """
-    n = len(df)
-    out = []
-    start = 0
-    batch_id = 1
-
-    delay_col = _first_existing_col(df, ["Departure Delay in Minutes", "DepartureDelay", "DepDelay"])
-    dist_col = _first_existing_col(df, ["Flight Distance", "FlightDistance", "Distance"])
-    sat_col = _first_existing_col(df, ["satisfaction", "Satisfaction", "satisfied"])
-
-    while start < n:
-        end = min(start + batch_size, n)
-        chunk = df.iloc[start:end]
+    from services.data_service import data_profile, iter_batches, schema_map, to_float_array
 
+    out = []
+    schema = schema_map()
+    profile = data_profile(batch_size=batch_size)  # a cold profile is streamed too
+    delay_col = schema.get("dep_delay")
+    dist_col = schema.get("distance")
+    sat_col = schema.get("satisfaction")
+    kpi_cols = [c for c in (delay_col, dist_col, sat_col) if c]
+    delay_sum, delay_count = 0.0, 0
+
+    for batch_id, chunk in enumerate(iter_batches(batch_size, columns=kpi_cols), start=1):
         rows = len(chunk)
-        missing = int(chunk.isna().sum().sum())
+        start = int(chunk.index[0]) if rows else 0
+        missing = profile.missing_in(start, start + rows)
 
         avg_delay = None
         if delay_col:
-            s = pd.to_numeric(chunk[delay_col], errors="coerce")
-            avg_delay = float(s.mean()) if s.notna().any() else None
+            s = to_float_array(chunk[delay_col])
+            ok = ~np.isnan(s)
+            if ok.any():
+                avg_delay = float(s[ok].mean())
+                delay_sum += float(s[ok].sum())
+                delay_count += int(ok.sum())
 
         avg_dist = None
         if dist_col:
-            s = pd.to_numeric(chunk[dist_col], errors="coerce")
-            avg_dist = float(s.mean()) if s.notna().any() else None
+            s = to_float_array(chunk[dist_col])
+            ok = ~np.isnan(s)
+            avg_dist = float(s[ok].mean()) if ok.any() else None
 
         sat_rate = None
         if sat_col:
             v = chunk[sat_col]
-            if v.dtype == object:
-                sat_rate = float((v.astype(str).str.lower().str.contains("satisf")).mean() * 100.0)
+            if not pd.api.types.is_numeric_dtype(v.dtype):
+                sat_rate = float(_satisfied_flags(v).mean() * 100.0)
             else:
                 vv = pd.to_numeric(v, errors="coerce")
                 if vv.notna().any():
@@ -230,10 +285,9 @@ def _batch_aggregate(df: pd.DataFrame, batch_size: int) -> pd.DataFrame:
             }
         )
 
-        start = end
-        batch_id += 1
-
-    return pd.DataFrame(out)
+    result = pd.DataFrame(out, columns=BATCH_COLUMNS)
+    result.attrs["avg_departure_delay"] = delay_sum / delay_count if delay_count else None
+    return result
 
 
 def _streaming_simulation(df: pd.DataFrame, window_size: int, steps: int, seed: int) -> pd.DataFrame:
@@ -242,31 +296,31 @@ def _streaming_simulation(df: pd.DataFrame, window_size: int, steps: int, seed:
     - sample a rolling window from the dataset
     - compute metrics per step
     """
+    from services.data_service import numeric_column, schema_map
+
     rng = np.random.default_rng(seed)
     n = len(df)
     if n == 0:
         return pd.DataFrame()
 
-    delay_col = _first_existing_col(df, ["Departure Delay in Minutes", "DepartureDelay", "DepDelay"])
-    dist_col = _first_existing_col(df, ["Flight Distance", "FlightDistance", "Distance"])
+    schema = schema_map()
+    delay_col = schema.get("dep_delay")
+    dist_col = schema.get("distance")
+
+    # windows are zero-copy slices of the shared pre-coerced arrays
+    delay = numeric_column(delay_col) if delay_col else None
+    dist = numeric_column(dist_col) if dist_col else None
 
     rows = []
     for t in range(1, steps + 1):
         start = int(rng.integers(0, max(1, n)))
         end = min(n, start + window_size)
-        window = df.iloc[start:end]
+        window = slice(start, end)
 
-        avg_delay = None
-        if delay_col:
-            s = pd.to_numeric(window[delay_col], errors="coerce")
-            avg_delay = float(s.mean()) if s.notna().any() else None
+        avg_delay = delay.mean(window) if delay is not None else None
+        avg_dist = dist.mean(window) if dist is not None else None
 
-        avg_dist = None
-        if dist_col:
-            s = pd.to_numeric(window[dist_col], errors="coerce")
-            avg_dist = float(s.mean()) if s.notna().any() else None
-
-        rows.append({"Step": t, "Window Rows": len(window), "Avg Delay": avg_delay, "Avg Distance": avg_dist})
+        rows.append({"Step": t, "Window Rows": end - start, "Avg Delay": avg_delay, "Avg Distance": avg_dist})
 
     return pd.DataFrame(rows)
 
@@ -276,7 +330,8 @@ def _streaming_simulation(df: pd.DataFrame, window_size: int, steps: int, seed:
 # -----------------------------
 def run_streamlit() -> None:
     import streamlit as st
-    from services.data_service import load_data
+    from services.artifact_service import cached_artifact, default_store
+    from services.data_service import cache_stats, data_profile, ingestion_info, load_data
 
     _safe_apply_global_styles()
     _inject_module_css()
@@ -295,13 +350,17 @@ def run_streamlit() -> None:
     )
 
     # timing load (cloud-style: show latency and caching behavior)
+    hits_before = cache_stats()["hits"]
     t0 = time.perf_counter()
     df = load_data()
     load_ms = (time.perf_counter() - t0) * 1000.0
+    stats = cache_stats()
+    load_badge = "Cache hit" if stats["hits"] > hits_before else "Cold load"
 
     total_rows = int(len(df))
     total_cols = int(df.shape[1])
-    missing_cells = int(df.isna().sum().sum())
+    profile = data_profile()
+    missing_cells = profile.missing_cells()
     mem_mb = _bytes_to_mb(_df_memory_bytes(df))
 
     k1, k2, k3, k4 = st.columns(4)
@@ -312,7 +371,51 @@ def run_streamlit() -> None:
     with k3:
         _kpi_card(st, "Missing Cells", f"{missing_cells:,}", "Data quality")
     with k4:
-        _kpi_card(st, "Load Time", f"{load_ms:.0f} ms", "Ingestion latency")
+        _kpi_card(st, "Load Time", f"{load_ms:.0f} ms", load_badge)
+
+    # CSV parse vs binary sidecar read (both measured by data_service on real loads)
+    info = ingestion_info()
+    csv_ms = info.get("csv_ms")
+    sidecar_ms = info.get("sidecar_ms")
+    speedup = f"{csv_ms / sidecar_ms:.1f}×" if csv_ms and sidecar_ms else "n/a"
+
+    i1, i2, i3, i4 = st.columns(4)
+    with i1:
+        _kpi_card(st, "CSV Parse", f"{csv_ms:.0f} ms" if csv_ms is not None else "n/a", "Text ingestion")
+    with i2:
+        _kpi_card(st, "Sidecar Read", f"{sidecar_ms:.0f} ms" if sidecar_ms is not None else "n/a", "Columnar cache")
+    with i3:
+        _kpi_card(st, "Sidecar Format", str(info.get("format", "none")), f"Last source: {info.get('last_source', 'n/a')}")
+    with i4:
+        _kpi_card(st, "Speed-up", speedup, "CSV ÷ sidecar")
+
+    st.caption(
+        f"Dataset cache — hits: {stats['hits']:,} · misses: {stats['misses']:,} · reloads: {stats['reloads']:,}"
+    )
+
+    cmp = _dtype_backend_comparison()
+    if cmp is not None:
+        st.markdown('<div class="section-title">🏹 NumPy vs Arrow dtypes</div>', unsafe_allow_html=True)
+        st.markdown(
+            '<div class="hint">Same dataset converted with to_arrow() for the measurement: string[pyarrow] labels and nullable Arrow numbers.</div>',
+            unsafe_allow_html=True,
+        )
+        np_, ar = cmp["numpy"], cmp["pyarrow"]
+        a1, a2, a3, a4 = st.columns(4)
+        with a1:
+            _kpi_card(st, "NumPy Memory", f"{np_['memory_mb']:.1f} MB", f"Measured in {np_['memory_ms']:.0f} ms")
+        with a2:
+            _kpi_card(st, "Arrow Memory", f"{ar['memory_mb']:.1f} MB", f"Measured in {ar['memory_ms']:.0f} ms")
+        with a3:
+            _kpi_card(st, "Label Scan (NumPy)", f"{np_['scan_ms']:.1f} ms" if np_["scan_ms"] is not None else "n/a", "lower().contains()")
+        with a4:
+            _kpi_card(st, "Label Scan (Arrow)", f"{ar['scan_ms']:.1f} ms" if ar["scan_ms"] is not None else "n/a", "lower().contains()")
+        st.caption(f"Load latency — NumPy: {np_['load_ms']:.1f} ms · Arrow conversion: {ar['load_ms']:.1f} ms (measured once per dataset version)")
+    else:
+        st.caption("Install pyarrow to compare NumPy- and Arrow-backed dtypes.")
+
+    with st.expander("Data quality profile (per column)"):
+        st.dataframe(profile.to_frame(), use_container_width=True)
 
     with st.expander("Preview sample records"):
         st.dataframe(df.head(20), use_container_width=True)
@@ -329,7 +432,13 @@ def run_streamlit() -> None:
     with c2:
         show_table = st.checkbox("Show batch table", value=True)
 
-    batch_df = _batch_aggregate(df, batch_size=batch_size)
+    batch_df = cached_artifact("module4.batch_aggregate", {"batch_size": batch_size}, lambda: _batch_aggregate(batch_size))
+    store = default_store()
+    art = store.stats()
+    st.caption(
+        f"Artifact store — hits: {art['hits']:,} · misses: {art['misses']:,} · "
+        f"size: {_bytes_to_mb(store.size_bytes()):.1f} / {_bytes_to_mb(store.max_bytes):.0f} MB"
+    )
 
     # chart: rows per batch
     chart_df = batch_df[["Batch", "Rows"]].set_index("Batch")
@@ -396,7 +505,8 @@ def run_streamlit() -> None:
 def run_cloud_analytics_cli():
     """Command-line interface for Cloud Analytics (summary only)."""
 
-    from services.data_service import load_data
+    from services.artifact_service import cached_artifact, default_store
+    from services.data_service import cache_stats, data_profile, ingestion_info, load_data
     import time
 
     print("\n=======================================")
@@ -412,7 +522,8 @@ def run_cloud_analytics_cli():
 
     total_rows = int(len(df))
     total_cols = int(df.shape[1])
-    missing_cells = int(df.isna().sum().sum())
+    profile = data_profile()
+    missing_cells = profile.missing_cells()
     mem_mb = _bytes_to_mb(_df_memory_bytes(df))
 
     print("📥 Data Ingestion Summary")
@@ -420,25 +531,45 @@ def run_cloud_analytics_cli():
     print(f" - Columns          : {total_cols}")
     print(f" - Missing cells    : {missing_cells:,}")
     print(f" - Estimated memory : {mem_mb:.2f} MB")
-    print(f" - Load time        : {load_ms:.0f} ms\n")
+    print(f" - Load time        : {load_ms:.0f} ms")
+    stats = cache_stats()
+    print(f" - Cache hits/misses: {stats['hits']}/{stats['misses']} (reloads: {stats['reloads']})")
+
+    info = ingestion_info()
+    csv_ms = info.get("csv_ms")
+    sidecar_ms = info.get("sidecar_ms")
+    print(f" - Sidecar format   : {info.get('format', 'none')} (last source: {info.get('last_source', 'n/a')})")
+    print(f" - CSV parse        : {f'{csv_ms:.0f} ms' if csv_ms is not None else 'n/a'}")
+    print(f" - Sidecar read     : {f'{sidecar_ms:.0f} ms' if sidecar_ms is not None else 'n/a'}\n")
+
+    cmp = _dtype_backend_comparison()
+    if cmp is not None:
+        print("🏹 NumPy vs Arrow dtypes")
+        for backend, label in (("numpy", "NumPy"), ("pyarrow", "Arrow")):
+            m = cmp[backend]
+            scan = f"{m['scan_ms']:.1f} ms" if m["scan_ms"] is not None else "n/a"
+            print(
+                f" - {label:<6} memory {m['memory_mb']:6.2f} MB · load {m['load_ms']:.1f} ms"
+                f" · memory scan {m['memory_ms']:.1f} ms · label scan {scan}"
+            )
+        print()
 
     # -----------------------------
     # Batch Processing
     # -----------------------------
     batch_size = 10000
-    batch_df = _batch_aggregate(df, batch_size=batch_size)
+    batch_df = cached_artifact("module4.batch_aggregate", {"batch_size": batch_size}, lambda: _batch_aggregate(batch_size))
 
     print("🧱 Batch Processing")
     print(f" - Batch size       : {batch_size}")
     print(f" - Total batches    : {len(batch_df)}")
     print(f" - Rows processed   : {int(batch_df['Rows'].sum()):,}")
 
-    delay_col = _first_existing_col(
-        df, ["Departure Delay in Minutes", "DepartureDelay", "DepDelay"]
-    )
-    if delay_col and batch_df["Avg Departure Delay"].notna().any():
-        avg_delay_overall = float(pd.to_numeric(df[delay_col], errors="coerce").mean())
+    avg_delay_overall = batch_df.attrs.get("avg_departure_delay")
+    if avg_delay_overall is not None:
         print(f" - Avg delay        : {avg_delay_overall:.2f} min")
+    art = default_store().stats()
+    print(f" - Artifact hits/misses: {art['hits']}/{art['misses']}")
 
     print()
 
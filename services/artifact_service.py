@@ -0,0 +1,187 @@
+# ============================================================
+# artifact_service.py – On-disk store for derived results
+#
+# Expensive derived results (simulated fuel, batch tables,
+# standardized scores) are saved under a cache folder and
+# keyed by (function name, parameters, dataset content fingerprint),
+# so Streamlit restarts and new CLI sessions reuse them.
+#
+# Each artifact is one pickle-free .npz file, written to a temp file
+# and renamed into place, so concurrent processes never see a partial
+# artifact. The folder is kept under a byte budget by evicting the
+# least recently used files (a hit refreshes the file's mtime).
+# ============================================================
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from services.data_service import BASE_DIR, atomic_write, content_fingerprint, read_npz, write_npz
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = Path(os.environ.get("SIA_ARTIFACT_DIR", BASE_DIR / ".cache" / "artifacts"))
+ARTIFACT_MAX_BYTES = int(float(os.environ.get("SIA_ARTIFACT_MAX_MB", "256")) * 1024 * 1024)
+
+Artifact = pd.DataFrame | np.ndarray
+
+
+def artifact_key(name: str, params: Mapping[str, object] | None, fingerprint: str) -> str:
+    """Stable file-safe key for (function name, parameters, dataset fingerprint)."""
+    payload = json.dumps({"name": name, "params": dict(params or {}), "data": fingerprint}, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _write_artifact(value: Artifact, target: Path) -> None:
+    if isinstance(value, np.ndarray):
+        meta = {"kind": "array"}
+        frame = pd.DataFrame({"values": value.reshape(-1)})
+        meta["shape"] = list(value.shape)
+    else:
+        index_names = [n if n is not None else f"__index_{i}__" for i, n in enumerate(value.index.names)]
+        frame = value.copy(deep=False)
+        frame.index.names = index_names
+        frame = frame.reset_index()
+        meta = {
+            "kind": "frame",
+            "index": index_names,
+            "unnamed_index": [n is None for n in value.index.names],
+            "attrs": value.attrs,
+        }
+    write_npz(frame, target, extra={"__artifact__": np.asarray(json.dumps(meta, default=str))})
+
+
+def _read_artifact(source: Path) -> Artifact:
+    with np.load(source, allow_pickle=False) as z:
+        meta = json.loads(str(z["__artifact__"]))
+    frame = read_npz(source)
+    if meta["kind"] == "array":
+        return frame["values"].to_numpy().reshape(meta["shape"])
+
+    frame = frame.set_index(meta["index"])
+    frame.index.names = [None if unnamed else n for n, unnamed in zip(meta["index"], meta["unnamed_index"])]
+    frame.attrs.update(meta.get("attrs", {}))
+    return frame
+
+
+class ArtifactStore:
+    """Size-bounded LRU folder of artifacts; safe to share between processes."""
+
+    def __init__(self, root: str | os.PathLike = ARTIFACT_DIR, max_bytes: int = ARTIFACT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.npz"
+
+    def get(self, key: str) -> Artifact | None:
+        """Return the artifact or None; a hit marks it most recently used."""
+        path = self._path(key)
+        try:
+            value = _read_artifact(path)
+            os.utime(path)
+        except FileNotFoundError:
+            value = None
+        except Exception as exc:  # truncated / foreign file -> treat as a miss
+            logger.warning("Artifact %s unreadable (%s); recomputing", path.name, exc)
+            value = None
+        with self._lock:
+            self._stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def put(self, key: str, value: Artifact) -> None:
+        """Write atomically, then evict least recently used files beyond max_bytes."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        atomic_write(self._path(key), lambda tmp: _write_artifact(value, tmp))
+        with self._lock:
+            self._stats["writes"] += 1
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete oldest artifacts until the folder fits the budget; returns files removed."""
+        entries = []
+        for path in self.root.glob("*.npz"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:  # removed by another process
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._stats["evictions"] += removed
+        return removed
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.root.glob("*.npz") if p.exists())
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def clear(self) -> None:
+        for path in self.root.glob("*.npz"):
+            path.unlink(missing_ok=True)
+
+
+_default_store: ArtifactStore | None = None
+
+
+def default_store() -> ArtifactStore:
+    """Process-wide store under ARTIFACT_DIR."""
+    global _default_store
+    if _default_store is None:
+        _default_store = ArtifactStore()
+    return _default_store
+
+
+def cached_artifact(
+    name: str,
+    params: Mapping[str, object] | None,
+    compute: Callable[[], Artifact],
+    path: str | os.PathLike | None = None,
+    store: ArtifactStore | None = None,
+) -> Artifact:
+    """
+    Return the stored result of ``compute()`` for this dataset version,
+    computing and storing it on a miss. Store failures (read-only
+    folder, full disk) only cost the recomputation.
+    """
+    store = store or default_store()
+    try:
+        key = artifact_key(name, params, content_fingerprint(path))
+    except OSError as exc:
+        logger.warning("No dataset fingerprint for %s (%s); not caching", name, exc)
+        return compute()
+
+    value = store.get(key)
+    if value is not None:
+        return value
+
+    value = compute()
+    try:
+        store.put(key, value)
+    except Exception as exc:
+        logger.warning("Could not store artifact %s: %s", name, exc)
+    return value
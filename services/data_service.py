@@ -1,4 +1,2124 @@
+# ============================================================
+# data_service.py – Shared dataset access layer
+#
+# All modules (UI + CLI) read the passenger dataset through
+# load_data(): columns are parsed once per process into a compact
+# declared schema, memoized by the file's size and mtime, and backed by
+# a typed columnar sidecar next to the CSV. iter_batches() streams the
+# same data in bounded chunks. Numeric columns, range indexes,
+# histograms, quantiles, profiles and correlations built on top are
+# cached per dataset version and updated in place when the feed only
+# appends rows.
+# ============================================================
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Mapping, Sequence
+from urllib.parse import unquote
+
+import numpy as np
 import pandas as pd
 
-def load_data():
-    return pd.read_csv("assets/train.csv")
+from services.schema_service import LOGICAL_FIELDS, SERVICE_RATING_FIELDS, SchemaMap, resolve_schema
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+# A file, a folder of partitions or a glob; override with SIA_DATA_PATH.
+DATA_PATH = Path(os.environ.get("SIA_DATA_PATH", BASE_DIR / "assets" / "train.csv"))
+
+# Bump when the on-disk sidecar layout or parsed dtypes change.
+SIDECAR_VERSION = 2
+
+# Parallel CSV parsing (cold starts): worker processes, and the smallest
+# file worth splitting. Override the default with SIA_CSV_WORKERS.
+CSV_WORKERS = int(os.environ.get("SIA_CSV_WORKERS", "1"))
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+
+
+# ============================================================
+# Declared schema
+# ============================================================
+@dataclass(frozen=True)
+class ColumnSpec:
+    """Declared dtype of a known column plus its valid value range."""
+
+    dtype: str
+    min_value: float | None = None
+    max_value: float | None = None
+
+
+SERVICE_RATING_COLUMNS = list(SERVICE_RATING_FIELDS.values())
+
+DATASET_SCHEMA: dict[str, ColumnSpec] = {
+    "Unnamed: 0": ColumnSpec("int32", 0),
+    "id": ColumnSpec("int32", 0),
+    "Gender": ColumnSpec("category"),
+    "Customer Type": ColumnSpec("category"),
+    "Age": ColumnSpec("uint8", 0, 120),
+    "Type of Travel": ColumnSpec("category"),
+    "Class": ColumnSpec("category"),
+    "Flight Distance": ColumnSpec("int16", 0, 20000),
+    **{c: ColumnSpec("int8", 0, 5) for c in SERVICE_RATING_COLUMNS},
+    "Departure Delay in Minutes": ColumnSpec("int32", 0),
+    "Arrival Delay in Minutes": ColumnSpec("float32", 0),
+    "satisfaction": ColumnSpec("category"),
+}
+
+
+def resolve_columns(available: Sequence[str], names: Sequence[str]) -> list[str]:
+    """
+    Map physical or logical column names (see schema_service.LOGICAL_FIELDS)
+    onto the columns that exist. Result keeps file order; names that match
+    nothing are skipped, as every page already handles optional columns.
+    """
+    return resolve_schema(available).resolve(names)
+
+
+def validate_schema(df: pd.DataFrame) -> list[str]:
+    """
+    Check a frame against DATASET_SCHEMA.
+    Returns human-readable problems (empty list = valid). Unknown
+    columns and absent optional columns are not reported.
+    """
+    problems = []
+    for col, spec in DATASET_SCHEMA.items():
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if str(s.dtype) != spec.dtype:
+            problems.append(f"{col}: dtype {s.dtype}, expected {spec.dtype}")
+        if spec.dtype == "category" or not pd.api.types.is_numeric_dtype(s.dtype):
+            continue
+        if spec.min_value is not None and (s < spec.min_value).any():
+            problems.append(f"{col}: values below {spec.min_value}")
+        if spec.max_value is not None and (s > spec.max_value).any():
+            problems.append(f"{col}: values above {spec.max_value}")
+    return problems
+
+
+def _coerce_to_spec(s: pd.Series, spec: ColumnSpec) -> pd.Series:
+    """Safe (slow-path) conversion used when the strict parse is rejected."""
+    if spec.dtype == "category":
+        return s.astype("category")
+
+    num = pd.to_numeric(s, errors="coerce")
+    target = np.dtype(spec.dtype)
+    if target.kind in "iu" and num.notna().all():
+        info = np.iinfo(target)
+        if num.empty or (num.min() >= info.min and num.max() <= info.max and (num % 1 == 0).all()):
+            return num.astype(target)
+    # NaNs, fractions or out-of-range values: keep them as floats instead of wrapping
+    return num.astype("float32" if target.itemsize <= 4 else "float64")
+
+
+# ============================================================
+# Process-wide dataset cache
+# ============================================================
+@dataclass(frozen=True)
+class Fingerprint:
+    """
+    Identity of one version of a dataset on disk. For partitioned
+    datasets size/mtime are totals and ``parts`` digests the file list.
+    """
+
+    path: str
+    size: int
+    mtime_ns: int
+    parts: str = ""
+
+
+@dataclass
+class _DatasetEntry:
+    """Columns loaded so far for one dataset version."""
+
+    fingerprint: Fingerprint
+    header: list[str]
+    columns: dict[str, pd.Series]
+    numeric: dict[str, "NumericColumn"] = field(default_factory=dict)
+    aggregates: dict[tuple, object] = field(default_factory=dict)
+    arrow: dict[str, pd.Series] = field(default_factory=dict)
+    # append tracking (single CSV): bytes parsed so far and their last bytes
+    byte_end: int = 0
+    tail_sig: bytes = b""
+
+
+# _cache_lock only guards the dicts; disk reads run under a per-dataset
+# load lock so cache hits (and other datasets) never wait on a parse.
+_cache_lock = threading.Lock()
+_load_locks: dict[str, threading.Lock] = {}
+_cache: dict[str, _DatasetEntry] = {}
+_cache_stats = {"hits": 0, "misses": 0, "reloads": 0}
+
+
+def _resolve_path(path: str | os.PathLike | None) -> Path:
+    return Path(path) if path is not None else DATA_PATH
+
+
+def file_fingerprint(path: str | os.PathLike | None = None) -> Fingerprint:
+    """Return the (path, size, mtime) fingerprint of the dataset file or partition set."""
+    if is_partitioned(path):
+        return _partitions_fingerprint(_resolve_path(path))
+    p = _resolve_path(path).resolve()
+    st = p.stat()
+    return Fingerprint(str(p), int(st.st_size), int(st.st_mtime_ns))
+
+
+_content_hashes: dict[Fingerprint, str] = {}
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_fingerprint(path: str | os.PathLike | None = None) -> str:
+    """
+    Hash of the dataset's bytes (all partition files for a folder/glob).
+    Unlike file_fingerprint() it survives copies and touch; it is memoized
+    per (path, size, mtime) and stored in the sidecar meta across restarts.
+    """
+    fp = file_fingerprint(path)
+    with _cache_lock:
+        hit = _content_hashes.get(fp)
+    if hit is not None:
+        return hit
+
+    if fp.parts:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in list_partitions(fp.path):
+            digest.update(f"{part.keys}|{_hash_file(part.file)}\n".encode())
+        value = digest.hexdigest()
+    else:
+        csv_path = Path(fp.path)
+        meta = _load_sidecar_meta(csv_path)
+        current = _sidecar_is_current(meta, fp)
+        value = meta.get("content") if current else None
+        if value is None:
+            value = _hash_file(csv_path)
+            if current:
+                meta["content"] = value
+                try:
+                    atomic_write(_sidecar_meta_path(csv_path), lambda tmp: tmp.write_text(json.dumps(meta, indent=2)))
+                except OSError:
+                    pass
+
+    with _cache_lock:
+        _content_hashes[fp] = value
+    return value
+
+
+def _parse_csv(
+    source: Path | bytes,
+    usecols: list[str] | None = None,
+    names: list[str] | None = None,
+    label: str = "",
+) -> pd.DataFrame:
+    """
+    Parse CSV text (a file, or header-less bytes with ``names``) straight
+    into DATASET_SCHEMA dtypes.
+
+    Narrow integer dtypes wrap silently on overflow, so the strict
+    parse is validated; if it fails (NaNs in an int column, stray text,
+    out-of-range values) the text is re-read and coerced column by column.
+    """
+    def read(**kwargs) -> pd.DataFrame:
+        if isinstance(source, bytes):
+            return pd.read_csv(io.BytesIO(source), header=None, names=names, usecols=usecols, **kwargs)
+        return pd.read_csv(source, usecols=usecols, **kwargs)
+
+    columns = usecols or names or list(pd.read_csv(source, nrows=0).columns)
+    specs = {c: DATASET_SCHEMA[c] for c in columns if c in DATASET_SCHEMA}
+
+    try:
+        df = read(dtype={c: spec.dtype for c, spec in specs.items()})
+        problems = validate_schema(df)
+    except (ValueError, TypeError, OverflowError) as exc:
+        problems = [str(exc)]
+
+    if not problems:
+        return df
+
+    logger.warning("Strict schema parse of %s rejected (%s); coercing", label, "; ".join(problems))
+    df = read(dtype={c: "category" for c, spec in specs.items() if spec.dtype == "category"})
+    for col, spec in specs.items():
+        df[col] = _coerce_to_spec(df[col], spec)
+    for problem in validate_schema(df):
+        logger.warning("Schema: %s", problem)
+    return df
+
+
+def _byte_ranges(path: Path, parts: int) -> tuple[list[str], list[tuple[int, int]]]:
+    """Header names plus ``parts`` newline-aligned (start, end) byte ranges of the body."""
+    size = path.stat().st_size
+    with open(path, "rb") as fh:
+        header = fh.readline()
+        body_start = fh.tell()
+        bounds = [body_start]
+        for i in range(1, parts):
+            fh.seek(body_start + (size - body_start) * i // parts)
+            fh.readline()  # move to the start of the next full line
+            pos = fh.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+        bounds.append(size)
+    names = list(pd.read_csv(io.BytesIO(header), nrows=0).columns)
+    return names, [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _parse_byte_range(path: str, start: int, end: int, names: list[str], usecols: list[str] | None) -> pd.DataFrame:
+    """Process-pool worker: parse one byte range of the CSV body."""
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        data = fh.read(end - start)
+    return _parse_csv(data, usecols=usecols, names=names, label=f"{Path(path).name}[{start}:{end}]")
+
+
+def _concat_parts(parts: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate in order, matching a serial parse: categoricals get one
+    sorted category set, and a column that some part had to coerce to
+    float takes that part's float dtype everywhere.
+    """
+    if len(parts) == 1:
+        return parts[0]
+    for col in parts[0].columns:
+        dtypes = [p[col].dtype for p in parts]
+        if all(isinstance(dt, pd.CategoricalDtype) for dt in dtypes):
+            union = sorted(set().union(*(p[col].cat.categories for p in parts)))
+            for p in parts:
+                p[col] = p[col].cat.set_categories(union)
+        elif len(set(map(str, dtypes))) > 1:
+            floats = [dt for dt in dtypes if getattr(dt, "kind", "") == "f"]
+            if floats:
+                for p in parts:
+                    p[col] = p[col].astype(floats[0])
+    return pd.concat(parts, ignore_index=True)
+
+
+def _read_csv(path: Path, usecols: list[str] | None = None, workers: int | None = None) -> pd.DataFrame:
+    """
+    Parse the dataset CSV. With ``workers`` > 1 (default: CSV_WORKERS)
+    and a file of at least PARALLEL_MIN_BYTES, the body is split into
+    newline-aligned byte ranges parsed in a process pool and concatenated
+    in order; the result is identical to the serial parse. Byte splitting
+    assumes no quoted field spans a line break (true for train.csv).
+    """
+    workers = CSV_WORKERS if workers is None else workers
+    if workers <= 1 or path.stat().st_size < PARALLEL_MIN_BYTES:
+        return _parse_csv(path, usecols=usecols, label=path.name)
+
+    names, ranges = _byte_ranges(path, workers)
+    if len(ranges) <= 1:
+        return _parse_csv(path, usecols=usecols, label=path.name)
+
+    ctx = multiprocessing.get_context("spawn")  # fork is unsafe in threaded hosts (Streamlit)
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=ctx) as pool:
+        futures = [pool.submit(_parse_byte_range, str(path), a, b, names, usecols) for a, b in ranges]
+        parts = [f.result() for f in futures]
+    logger.info("Parsed %s in %d parallel parts", path.name, len(parts))
+    return _concat_parts(parts)
+
+
+# ============================================================
+# Columnar sidecar (binary cache next to the CSV)
+# ============================================================
+def sidecar_format() -> str:
+    """Best binary format available in this environment."""
+    try:
+        import pyarrow  # noqa: F401
+
+        return "feather"
+    except ImportError:
+        pass
+    try:
+        import fastparquet  # noqa: F401
+
+        return "parquet"
+    except ImportError:
+        return "npz"
+
+
+def _sidecar_meta_path(csv_path: Path) -> Path:
+    return csv_path.with_name(csv_path.stem + ".sidecar.json")
+
+
+def _sidecar_data_path(csv_path: Path, fmt: str) -> Path:
+    return csv_path.with_suffix("." + fmt)
+
+
+def atomic_write(target: Path, writer: Callable[[Path], None]) -> None:
+    """Write via a temp file in the same folder, then rename into place."""
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        writer(tmp)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def write_npz(df: pd.DataFrame, target: Path, extra: dict[str, np.ndarray] | None = None) -> None:
+    """Pickle-free .npz layout: one array per column, plus masks/categories (and ``extra`` members)."""
+    arrays: dict[str, np.ndarray] = {"__columns__": np.asarray([str(c) for c in df.columns], dtype=str)}
+    kinds = []
+    for i, col in enumerate(df.columns):
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            arrays[f"c{i}"] = s.cat.codes.to_numpy()
+            arrays[f"c{i}_categories"] = np.asarray(s.cat.categories.astype(str), dtype=str)
+            kinds.append("category")
+        elif pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_extension_array_dtype(s.dtype):
+            arrays[f"c{i}"] = s.to_numpy()
+            kinds.append("numeric")
+        elif pd.api.types.is_numeric_dtype(s.dtype):
+            arrays[f"c{i}"] = s.to_numpy(dtype="float64", na_value=np.nan)
+            kinds.append("numeric")
+        else:
+            arrays[f"c{i}"] = s.fillna("").astype(str).to_numpy(dtype=str)
+            arrays[f"c{i}_mask"] = s.isna().to_numpy()
+            kinds.append("string")
+    arrays["__kinds__"] = np.asarray(kinds, dtype=str)
+    arrays.update(extra or {})
+
+    with open(target, "wb") as fh:
+        np.savez(fh, **arrays)
+
+
+def read_npz(source: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """Frame written by write_npz(), optionally only ``columns``."""
+    # np.load is lazy per member, so unselected columns are never decompressed
+    with np.load(source, allow_pickle=False) as z:
+        all_columns = [str(c) for c in z["__columns__"]]
+        kinds = [str(k) for k in z["__kinds__"]]
+        wanted = set(all_columns if columns is None else columns)
+        data = {}
+        for i, (col, kind) in enumerate(zip(all_columns, kinds)):
+            if col not in wanted:
+                continue
+            values = z[f"c{i}"]
+            if kind == "category":
+                data[col] = pd.Categorical.from_codes(values, categories=z[f"c{i}_categories"])
+            elif kind == "string":
+                data[col] = pd.Series(values).where(~z[f"c{i}_mask"])
+            else:
+                data[col] = values
+    return pd.DataFrame(data)
+
+
+def _write_sidecar(df: pd.DataFrame, target: Path, fmt: str) -> None:
+    if fmt == "feather":
+        atomic_write(target, lambda tmp: df.reset_index(drop=True).to_feather(tmp))
+    elif fmt == "parquet":
+        atomic_write(target, lambda tmp: df.to_parquet(tmp, index=False))
+    else:
+        atomic_write(target, lambda tmp: write_npz(df, tmp))
+
+
+def _read_sidecar(source: Path, fmt: str, columns: list[str] | None = None) -> pd.DataFrame:
+    if fmt == "feather":
+        return pd.read_feather(source, columns=columns)
+    if fmt == "parquet":
+        return pd.read_parquet(source, columns=columns)
+    return read_npz(source, columns)
+
+
+def _load_sidecar_meta(csv_path: Path) -> dict | None:
+    try:
+        return json.loads(_sidecar_meta_path(csv_path).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _sidecar_is_current(meta: dict | None, fp: Fingerprint) -> bool:
+    if not meta or meta.get("version") != SIDECAR_VERSION:
+        return False
+    src = meta.get("source", {})
+    return src.get("size") == fp.size and src.get("mtime_ns") == fp.mtime_ns
+
+
+# ============================================================
+# Partitioned datasets (folder / glob of files)
+# ============================================================
+PARTITION_FORMATS = {".csv": "csv", ".feather": "feather", ".parquet": "parquet", ".npz": "npz"}
+
+
+@dataclass(frozen=True)
+class Partition:
+    """One data file of a partitioned dataset and its ``key=value`` folder keys."""
+
+    file: Path
+    fmt: str
+    keys: tuple[tuple[str, str], ...] = ()
+
+
+def is_partitioned(path: str | os.PathLike | None) -> bool:
+    """True when ``path`` is a folder or a glob pattern rather than one file."""
+    p = _resolve_path(path)
+    return any(ch in str(p) for ch in "*?[") or p.is_dir()
+
+
+def _partition_column(key: str) -> str:
+    """Column name for a partition key: logical names map to their canonical column."""
+    candidates = LOGICAL_FIELDS.get(key.lower())
+    return candidates[0] if candidates else key
+
+
+def list_partitions(path: str | os.PathLike) -> list[Partition]:
+    """Data files of a partitioned dataset in stable (path) order."""
+    p = Path(path)
+    if p.is_dir():
+        root = p
+        files = [f for f in p.rglob("*") if f.is_file()]
+    else:
+        static = []
+        for part in p.parts:
+            if any(ch in part for ch in "*?["):
+                break
+            static.append(part)
+        root = Path(*static) if static else Path(".")
+        files = [Path(f) for f in glob.glob(str(p), recursive=True) if Path(f).is_file()]
+
+    parts = []
+    for f in sorted(files):
+        fmt = PARTITION_FORMATS.get(f.suffix.lower())
+        if fmt is None or f.name.startswith("."):
+            continue
+        if fmt != "csv" and f.with_suffix(".csv").exists():
+            continue  # sidecar of a CSV partition, not a partition itself
+        keys = []
+        for folder in f.relative_to(root).parent.parts:
+            if "=" in folder:
+                key, value = folder.split("=", 1)
+                keys.append((_partition_column(unquote(key)), unquote(value)))
+        parts.append(Partition(f, fmt, tuple(keys)))
+    return parts
+
+
+def _partitions_fingerprint(path: str | os.PathLike) -> Fingerprint:
+    p = Path(path).resolve()
+    parts = list_partitions(p)
+    if not parts:
+        raise FileNotFoundError(f"No data files found under {path}")
+    digest = hashlib.blake2b(digest_size=16)
+    size = mtime = 0
+    for part in parts:
+        st = part.file.stat()
+        size += st.st_size
+        mtime = max(mtime, st.st_mtime_ns)
+        digest.update(f"{part.file}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return Fingerprint(str(p), int(size), int(mtime), digest.hexdigest())
+
+
+def _file_columns(file: Path, fmt: str) -> list[str]:
+    if fmt == "csv":
+        return list(pd.read_csv(file, nrows=0).columns)
+    if fmt == "npz":
+        with np.load(file, allow_pickle=False) as z:
+            return [str(c) for c in z["__columns__"]]
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+
+            return list(pq.read_schema(file).names)
+        except ImportError:
+            from fastparquet import ParquetFile
+
+            return list(ParquetFile(str(file)).columns)
+    import pyarrow as pa
+
+    with pa.memory_map(str(file)) as source:
+        return list(pa.ipc.open_file(source).schema.names)
+
+
+def _partitions_header(path: str) -> list[str]:
+    """First file's columns (feeds share one layout) followed by partition key columns."""
+    parts = list_partitions(path)
+    header = _file_columns(parts[0].file, parts[0].fmt)
+    for part in parts:
+        for col, _ in part.keys:
+            if col not in header:
+                header.append(col)
+    return header
+
+
+def _select_partitions(parts: list[Partition], filters: Mapping[str, object] | None) -> list[Partition]:
+    """Prune partitions whose key values fall outside ``filters`` (no file is opened)."""
+    if not filters:
+        return parts
+    known = {col for part in parts for col, _ in part.keys}
+    selected = parts
+    for key, allowed in filters.items():
+        col = key if key in known else _partition_column(key)
+        if col not in known:
+            raise ValueError(f"{key!r} is not a partition key (available: {sorted(known)})")
+        values = {str(allowed)} if isinstance(allowed, (str, int, float)) else {str(v) for v in allowed}
+        selected = [part for part in selected if dict(part.keys).get(col) in values]
+    return selected
+
+
+def _filters_key(filters: Mapping[str, object] | None) -> str:
+    if not filters:
+        return ""
+    items = []
+    for key, allowed in sorted(filters.items()):
+        values = [str(allowed)] if isinstance(allowed, (str, int, float)) else sorted(str(v) for v in allowed)
+        items.append(f"{key}={','.join(values)}")
+    return "?" + "&".join(items)
+
+
+def _read_partition_file(file: str, fmt: str, columns: list[str]) -> pd.DataFrame:
+    """Process-pool worker: read the requested columns (those present) of one partition file."""
+    path = Path(file)
+    present = set(_file_columns(path, fmt))
+    usecols = [c for c in columns if c in present]
+    if fmt == "csv":
+        return _parse_csv(path, usecols=usecols, label=path.name)
+    df = _read_sidecar(path, fmt, usecols)
+    # binary feeds written by other tools may not use DATASET_SCHEMA dtypes
+    for col in usecols:
+        spec = DATASET_SCHEMA.get(col)
+        if spec is not None and str(df[col].dtype) != spec.dtype:
+            df[col] = _coerce_to_spec(df[col], spec)
+    return df
+
+
+def _with_partition_columns(
+    frame: pd.DataFrame, part: Partition, columns: list[str], categories: dict[str, list[str]]
+) -> pd.DataFrame:
+    keys = dict(part.keys)
+    for col in columns:
+        if col in categories:
+            code = categories[col].index(keys[col]) if col in keys else -1
+            frame[col] = pd.Categorical.from_codes(np.full(len(frame), code, dtype="int32"), categories[col])
+    return frame
+
+
+def _partition_categories(parts: list[Partition]) -> dict[str, list[str]]:
+    cats: dict[str, set[str]] = {}
+    for part in parts:
+        for col, value in part.keys:
+            cats.setdefault(col, set()).add(value)
+    return {col: sorted(values) for col, values in cats.items()}
+
+
+def _load_partitions(
+    fp: Fingerprint, columns: list[str] | None, workers: int | None, filters: Mapping[str, object] | None
+) -> pd.DataFrame:
+    """Read the selected partitions (in parallel when workers > 1) and stitch them in order."""
+    all_parts = list_partitions(fp.path)
+    parts = _select_partitions(all_parts, filters)
+    wanted = columns if columns is not None else _partitions_header(fp.path)
+    categories = _partition_categories(all_parts)
+    file_columns = [c for c in wanted if c not in categories]
+
+    t0 = time.perf_counter()
+    workers = CSV_WORKERS if workers is None else workers
+    if workers > 1 and len(parts) > 1:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(parts)), mp_context=ctx) as pool:
+            futures = [pool.submit(_read_partition_file, str(p.file), p.fmt, file_columns) for p in parts]
+            frames = [f.result() for f in futures]
+    else:
+        frames = [_read_partition_file(str(p.file), p.fmt, file_columns) for p in parts]
+
+    frames = [_with_partition_columns(f, p, wanted, categories) for f, p in zip(frames, parts)]
+    df = _concat_parts(frames) if frames else pd.DataFrame(columns=wanted)
+    _ingestion_info[fp.path] = {
+        "last_source": "partitions",
+        "format": "partitioned",
+        "files": len(all_parts),
+        "files_read": len(parts),
+        "csv_ms": (time.perf_counter() - t0) * 1000.0,
+    }
+    return df.reindex(columns=wanted)
+
+
+_ingestion_info: dict[str, dict] = {}
+_unwritable_sidecars: set[str] = set()
+
+
+def _read_header(fp: Fingerprint) -> list[str]:
+    if fp.parts:
+        return _partitions_header(fp.path)
+    meta = _load_sidecar_meta(Path(fp.path))
+    if _sidecar_is_current(meta, fp) and meta.get("columns"):
+        return list(meta["columns"])
+    return list(pd.read_csv(fp.path, nrows=0).columns)
+
+
+def _load_from_disk(
+    fp: Fingerprint,
+    columns: list[str] | None,
+    rebuild: bool,
+    workers: int | None = None,
+    filters: Mapping[str, object] | None = None,
+) -> pd.DataFrame:
+    """
+    Read ``columns`` (None = all) from the sidecar when it matches the
+    CSV. Otherwise parse the full CSV once and (re)build the sidecar; if
+    the sidecar cannot be written here, parse only ``columns`` via usecols.
+    Partitioned datasets are read file by file (no sidecar).
+    """
+    if fp.parts:
+        return _load_partitions(fp, columns, workers, filters)
+    if filters:
+        raise ValueError("filters select partitions; this dataset is a single file")
+
+    csv_path = Path(fp.path)
+    meta = _load_sidecar_meta(csv_path)
+
+    if not rebuild and _sidecar_is_current(meta, fp):
+        data_path = csv_path.with_name(meta["file"])
+        try:
+            t0 = time.perf_counter()
+            df = _read_sidecar(data_path, meta["format"], columns)
+            meta["sidecar_ms"] = (time.perf_counter() - t0) * 1000.0
+            meta["last_source"] = "sidecar"
+            _ingestion_info[fp.path] = meta
+            return df
+        except Exception as exc:  # corrupt / engine removed -> fall back to CSV
+            logger.warning("Sidecar %s unreadable (%s); rebuilding from CSV", data_path, exc)
+
+    if not rebuild and columns is not None and fp.path in _unwritable_sidecars:
+        t0 = time.perf_counter()
+        df = _read_csv(csv_path, usecols=columns, workers=workers)
+        _ingestion_info[fp.path] = {"csv_ms": (time.perf_counter() - t0) * 1000.0, "last_source": "csv"}
+        return df
+
+    t0 = time.perf_counter()
+    df = _read_csv(csv_path, workers=workers)
+    csv_ms = (time.perf_counter() - t0) * 1000.0
+
+    fmt = sidecar_format()
+    info = {
+        "version": SIDECAR_VERSION,
+        "source": {"size": fp.size, "mtime_ns": fp.mtime_ns},
+        "format": fmt,
+        "file": _sidecar_data_path(csv_path, fmt).name,
+        "rows": int(len(df)),
+        "columns": [str(c) for c in df.columns],
+        "csv_ms": csv_ms,
+        "sidecar_ms": None,
+        "last_source": "csv",
+    }
+    try:
+        data_path = _sidecar_data_path(csv_path, fmt)
+        _write_sidecar(df, data_path, fmt)
+        # keep the frame just parsed; sidecar read latency is recorded on the next cold start
+        atomic_write(_sidecar_meta_path(csv_path), lambda tmp: tmp.write_text(json.dumps(info, indent=2)))
+        logger.info("Wrote %s sidecar for %s", fmt, csv_path.name)
+    except Exception as exc:  # read-only deploys still work, just without the sidecar
+        logger.warning("Could not write sidecar for %s: %s", csv_path, exc)
+        _unwritable_sidecars.add(fp.path)
+
+    _ingestion_info[fp.path] = info
+    return df if columns is None else df[columns]
+
+
+# ============================================================
+# Public API
+# ============================================================
+def load_data(
+    path: str | os.PathLike | None = None,
+    columns: Sequence[str] | None = None,
+    rebuild_sidecar: bool = False,
+    workers: int | None = None,
+    filters: Mapping[str, object] | None = None,
+    dtype_backend: str = "numpy",
+) -> pd.DataFrame:
+    """
+    Return the passenger dataset (default: assets/train.csv).
+
+    ``columns`` may mix physical names and logical names from
+    schema_service (e.g. "distance", "dep_delay"); only those columns are
+    read and cached, in file order. Missing optional columns are skipped.
+
+    Columns are parsed once per process and reused until the file's
+    size or mtime changes. Each call returns a new frame sharing the
+    cached columns, so callers may add or replace columns freely; edits
+    in place never reach the cache because pandas 3 is copy-on-write.
+    ``rebuild_sidecar=True`` forces a CSV parse and rewrites the sidecar.
+    ``workers`` sets the process count for a cold CSV parse (default
+    CSV_WORKERS); the parsed frame is the same for any worker count.
+
+    For a partitioned ``path`` (folder or glob), ``filters`` such as
+    ``{"class": ["Business"]}`` keep only matching partitions; pruned
+    files are never opened.
+
+    ``dtype_backend="pyarrow"`` returns Arrow-backed columns
+    (string[pyarrow] for labels, nullable Arrow integers/floats) when
+    pyarrow is installed; otherwise the default NumPy-backed frame.
+    """
+    if dtype_backend not in ("numpy", "pyarrow"):
+        raise ValueError(f"dtype_backend must be 'numpy' or 'pyarrow', not {dtype_backend!r}")
+    arrow = dtype_backend == "pyarrow" and arrow_available()
+
+    fp = file_fingerprint(path)
+    key = fp.path + _filters_key(filters)
+    _await_warmup(fp)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry.fingerprint == fp and not rebuild_sidecar:
+            wanted = list(entry.header) if columns is None else resolve_columns(entry.header, columns)
+            if all(c in entry.columns for c in wanted):
+                _cache_stats["hits"] += 1
+                return _entry_frame(entry, wanted, arrow)
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+
+    with load_lock:
+        with _cache_lock:
+            entry = _cache.get(key)
+            reload = entry is not None and entry.fingerprint != fp
+            # an append only parses the new tail, so it stays under the dict lock
+            if reload and not filters and not rebuild_sidecar and _append_tail(entry, fp):
+                reload = False
+        if entry is None or reload or rebuild_sidecar:
+            entry = _new_entry(fp)
+
+        with _cache_lock:
+            wanted = list(entry.header) if columns is None else resolve_columns(entry.header, columns)
+            missing = [c for c in wanted if c not in entry.columns]
+            if not missing and not rebuild_sidecar:
+                _cache_stats["hits"] += 1
+                _cache[key] = entry
+                return _entry_frame(entry, wanted, arrow)
+            if reload:
+                _cache_stats["reloads"] += 1
+                logger.info("Reloading %s", fp.path)
+            else:
+                _cache_stats["misses"] += 1
+            rows = next(iter(entry.columns.values()), None)
+
+        full = len(missing) == len(entry.header)
+        df = _load_from_disk(fp, None if full else missing, rebuild_sidecar, workers, filters)
+        if rows is not None and len(rows) != len(df):
+            # appended rows (or a half-written line) differ from the disk read: start over
+            entry = _new_entry(fp)
+            missing = wanted
+            full = len(missing) == len(entry.header)
+            df = _load_from_disk(fp, None if full else missing, False, workers, filters)
+
+        with _cache_lock:
+            for col in missing:
+                entry.columns[col] = df[col]
+            _cache[key] = entry
+            return _entry_frame(entry, wanted, arrow)
+
+
+def _entry_frame(entry: _DatasetEntry, wanted: list[str], arrow: bool) -> pd.DataFrame:
+    """A new frame over the cached columns (caller holds _cache_lock)."""
+    if arrow:
+        return pd.DataFrame({c: _arrow_column(entry, c) for c in wanted}, copy=False)
+    return pd.DataFrame({c: entry.columns[c] for c in wanted}, copy=False)
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+def _arrow_series(s: pd.Series) -> pd.Series:
+    import pyarrow as pa
+
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        # zero-copy for null-free numbers; NaN becomes a proper null
+        values = pd.arrays.ArrowExtensionArray(pa.array(s.to_numpy(), from_pandas=True))
+        return pd.Series(values, index=s.index, name=s.name)
+    return s.astype("string[pyarrow]")
+
+
+def _arrow_column(entry: _DatasetEntry, col: str) -> pd.Series:
+    """Arrow-backed view of a cached column (caller holds the lock); built once per version."""
+    hit = entry.arrow.get(col)
+    if hit is None:
+        hit = entry.arrow[col] = _arrow_series(entry.columns[col])
+    return hit
+
+
+def to_arrow(df: pd.DataFrame) -> pd.DataFrame:
+    """Arrow-backed copy of ``df`` (same conversion as dtype_backend="pyarrow"), not cached."""
+    return pd.DataFrame({c: _arrow_series(df[c]) for c in df.columns}, copy=False)
+
+
+def _new_entry(fp: Fingerprint) -> _DatasetEntry:
+    entry = _DatasetEntry(fp, _read_header(fp), {})
+    if not fp.parts:
+        entry.byte_end = fp.size
+        entry.tail_sig = _read_bytes(Path(fp.path), max(fp.size - 64, 0), fp.size)
+    return entry
+
+
+def _read_bytes(path: Path, start: int, end: int) -> bytes:
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        return fh.read(end - start)
+
+
+def _append_tail(entry: _DatasetEntry, fp: Fingerprint) -> bool:
+    """
+    Fold rows appended to a single CSV into ``entry`` (caller holds the
+    lock). Returns False when the file was rewritten rather than grown.
+    Only complete lines are parsed; a half-written last line waits for
+    the next call.
+    """
+    if fp.parts or not entry.columns or not entry.tail_sig or fp.size <= entry.byte_end:
+        return False
+    path = Path(fp.path)
+    if not entry.tail_sig.endswith(b"\n"):
+        return False
+    if _read_bytes(path, entry.byte_end - len(entry.tail_sig), entry.byte_end) != entry.tail_sig:
+        return False
+
+    data = _read_bytes(path, entry.byte_end, fp.size)
+    cut = data.rfind(b"\n") + 1
+    t0 = time.perf_counter()
+    if cut:
+        tail = _parse_csv(data[:cut], names=entry.header, usecols=list(entry.columns), label=f"{path.name} (append)")
+        old_rows = len(next(iter(entry.columns.values())))
+        tail.index = pd.RangeIndex(old_rows, old_rows + len(tail))
+        merged = _concat_parts([pd.DataFrame(entry.columns, copy=False), tail])
+        entry.columns = {c: merged[c] for c in entry.columns}
+        entry.arrow.clear()
+
+        tail_values = {}
+        for col, num in list(entry.numeric.items()):
+            tail_values[col] = to_float_array(tail[col])
+            values = np.concatenate([num.values, tail_values[col]])
+            valid = ~np.isnan(values)
+            values.flags.writeable = False
+            valid.flags.writeable = False
+            entry.numeric[col] = NumericColumn(col, values, valid)
+        for agg_key, agg in list(entry.aggregates.items()):
+            if agg_key[0] in ("prefix", "derived", "sample", "quantile"):  # rebuilt on next use
+                del entry.aggregates[agg_key]
+                continue
+            entry.aggregates[agg_key] = agg.merge(_compute_aggregate(agg_key, tail_values.__getitem__))
+
+        entry.byte_end += cut
+        entry.tail_sig = _read_bytes(path, max(entry.byte_end - 64, 0), entry.byte_end)
+        logger.info("Appended %d rows from %s", len(tail), path.name)
+
+    entry.fingerprint = fp
+    _ingestion_info[fp.path] = {
+        **_ingestion_info.get(fp.path, {}),
+        "last_source": "append",
+        "appended_rows": len(tail) if cut else 0,
+        "append_ms": (time.perf_counter() - t0) * 1000.0,
+    }
+    return True
+
+
+def schema_map(path: str | os.PathLike | None = None) -> SchemaMap:
+    """Logical -> physical column mapping of the current dataset version (cached per fingerprint)."""
+    fp = file_fingerprint(path)
+    with _cache_lock:
+        entry = _cache.get(fp.path)
+        if entry is not None and entry.fingerprint == fp:
+            return resolve_schema(entry.header)
+    return resolve_schema(_read_header(fp))
+
+
+# ============================================================
+# Pre-coerced numeric columns
+# ============================================================
+@dataclass(frozen=True)
+class NumericColumn:
+    """
+    One column coerced to numbers once per dataset version.
+    ``values`` is a read-only contiguous float64 array (NaN where the
+    cell is missing or not numeric); ``valid`` is the matching mask.
+    Positions are row numbers of the full dataset.
+    """
+
+    name: str
+    values: np.ndarray
+    valid: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def mean(self, rows=None) -> float | None:
+        """Mean over valid cells, optionally of ``rows`` (mask, indices or slice)."""
+        v = self.values if rows is None else self.values[rows]
+        ok = ~np.isnan(v)
+        n = int(ok.sum())
+        return float(v[ok].sum() / n) if n else None
+
+
+def to_float_array(s: pd.Series) -> np.ndarray:
+    """Contiguous float64 copy of a Series (NaN where not numeric); no string re-parse for numeric dtypes."""
+    if not pd.api.types.is_numeric_dtype(s.dtype):
+        s = pd.to_numeric(s.astype(str), errors="coerce")
+    return np.ascontiguousarray(s.to_numpy(dtype="float64", na_value=np.nan))
+
+
+def numeric_column(name: str, path: str | os.PathLike | None = None) -> NumericColumn | None:
+    """
+    Return the pre-coerced numeric view of a column (physical or logical
+    name, e.g. "distance"), or None if the dataset has no such column.
+    Built on first use and reused until the dataset changes.
+    """
+    fp = file_fingerprint(path)
+    with _cache_lock:
+        entry = _cache.get(fp.path)
+        header = entry.header if entry is not None and entry.fingerprint == fp else _read_header(fp)
+        resolved = resolve_columns(header, [name])
+        if not resolved:
+            return None
+        col = resolved[0]
+        if entry is not None and entry.fingerprint == fp and col in entry.numeric:
+            return entry.numeric[col]
+
+    series = load_data(path, columns=[col])[col]
+    with _cache_lock:
+        entry = _cache.get(fp.path)
+        if entry is not None and col in entry.numeric and len(entry.numeric[col]) == len(series):
+            return entry.numeric[col]
+    values = to_float_array(series)
+    valid = ~np.isnan(values)
+    values.flags.writeable = False
+    valid.flags.writeable = False
+    numeric = NumericColumn(col, values, valid)
+
+    with _cache_lock:
+        entry = _cache.get(fp.path)
+        if entry is not None and entry.fingerprint == fp:
+            numeric = entry.numeric.setdefault(col, numeric)
+    return numeric
+
+
+# ============================================================
+# Mergeable aggregates
+# ============================================================
+# Distinct values kept exactly by ValueHistogram before snapping to a grid.
+HISTOGRAM_MAX_BINS = 1 << 16
+# RangeQuantiles: most distinct values for the counting layout, smallest
+# block of rows, and memory budget for its per-block prefix counts.
+QUANTILE_MAX_SUPPORT = 1 << 14
+QUANTILE_BLOCK_ROWS = 1024
+QUANTILE_PREFIX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ColumnStats:
+    """
+    Count, sum, sum of squares, min/max and an optional fixed-edge
+    histogram of a numeric column. Stats of two row blocks merge()
+    into the stats of both, so appended rows only cost their own scan.
+    """
+
+    count: int
+    total: float
+    total_sq: float
+    minimum: float
+    maximum: float
+    edges: tuple[float, ...] = ()
+    hist: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+
+    @classmethod
+    def of(cls, values: np.ndarray, edges: Sequence[float] = ()) -> "ColumnStats":
+        v = values[~np.isnan(values)]
+        hist = np.histogram(v, bins=np.asarray(edges))[0] if len(edges) else np.zeros(0, dtype=np.int64)
+        return cls(
+            int(v.size),
+            float(v.sum()),
+            float(np.dot(v, v)),
+            float(v.min()) if v.size else np.nan,
+            float(v.max()) if v.size else np.nan,
+            tuple(edges),
+            hist,
+        )
+
+    def merge(self, other: "ColumnStats") -> "ColumnStats":
+        return ColumnStats(
+            self.count + other.count,
+            self.total + other.total,
+            self.total_sq + other.total_sq,
+            float(np.fmin(self.minimum, other.minimum)),
+            float(np.fmax(self.maximum, other.maximum)),
+            self.edges,
+            self.hist + other.hist,
+        )
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def var(self, ddof: int = 0) -> float | None:
+        if self.count - ddof <= 0:
+            return None
+        return max(self.total_sq - self.total * self.total / self.count, 0.0) / (self.count - ddof)
+
+    def std(self, ddof: int = 0) -> float | None:
+        var = self.var(ddof)
+        return None if var is None else float(np.sqrt(var))
+
+
+@dataclass(frozen=True)
+class BucketMeans:
+    """Per-bucket count and sum of ``y`` over right-closed ``x`` buckets (as pd.cut); mergeable."""
+
+    edges: tuple[float, ...]
+    counts: np.ndarray
+    sums: np.ndarray
+
+    @classmethod
+    def of(cls, x: np.ndarray, y: np.ndarray, edges: Sequence[float]) -> "BucketMeans":
+        k = len(edges) - 1
+        idx = np.searchsorted(np.asarray(edges), x, side="left") - 1
+        ok = ~np.isnan(x) & ~np.isnan(y) & (idx >= 0) & (idx < k)
+        return cls(
+            tuple(edges),
+            np.bincount(idx[ok], minlength=k),
+            np.bincount(idx[ok], weights=y[ok], minlength=k),
+        )
+
+    def merge(self, other: "BucketMeans") -> "BucketMeans":
+        return BucketMeans(self.edges, self.counts + other.counts, self.sums + other.sums)
+
+    def means(self) -> np.ndarray:
+        """Mean of ``y`` per bucket (NaN for empty buckets)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.counts > 0, self.sums / np.maximum(self.counts, 1), np.nan)
+
+
+@dataclass(frozen=True)
+class ValueHistogram:
+    """
+    Count per distinct value (the finest histogram of a column) kept as
+    cumulative counts, so np.histogram counts for any edges are binary
+    searches: bins sliders and range filters re-bin it without touching
+    rows. Columns with more than HISTOGRAM_MAX_BINS distinct values are
+    snapped to that many equal-width bins (exact to one bin width).
+    """
+
+    support: np.ndarray
+    cum: np.ndarray  # cum[i] = number of values below support[i]; len(support) + 1 entries
+
+    @classmethod
+    def of(cls, values: np.ndarray) -> "ValueHistogram":
+        support, counts = np.unique(values[~np.isnan(values)], return_counts=True)
+        return cls._build(support, counts)
+
+    @classmethod
+    def _build(cls, support: np.ndarray, counts: np.ndarray) -> "ValueHistogram":
+        if len(support) > HISTOGRAM_MAX_BINS:
+            lo, step = support[0], (support[-1] - support[0]) / HISTOGRAM_MAX_BINS
+            fine = np.minimum(((support - lo) / step).astype(np.int64), HISTOGRAM_MAX_BINS - 1)
+            counts = np.bincount(fine, weights=counts, minlength=HISTOGRAM_MAX_BINS).astype(np.int64)
+            support = lo + np.arange(HISTOGRAM_MAX_BINS) * step
+            keep = counts > 0
+            support, counts = support[keep], counts[keep]
+        cum = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+        support = np.asarray(support, dtype=np.float64)
+        support.flags.writeable = False
+        cum.flags.writeable = False
+        return cls(support, cum)
+
+    def merge(self, other: "ValueHistogram") -> "ValueHistogram":
+        support, inverse = np.unique(np.concatenate([self.support, other.support]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([np.diff(self.cum), np.diff(other.cum)]))
+        return ValueHistogram._build(support, counts.astype(np.int64))
+
+    @property
+    def total(self) -> int:
+        return int(self.cum[-1])
+
+    @property
+    def minimum(self) -> float | None:
+        return float(self.support[0]) if len(self.support) else None
+
+    @property
+    def maximum(self) -> float | None:
+        return float(self.support[-1]) if len(self.support) else None
+
+    def between(self, lo: float, hi: float) -> "ValueHistogram":
+        """The histogram of values with lo <= value <= hi."""
+        a = int(np.searchsorted(self.support, lo, side="left"))
+        b = max(a, int(np.searchsorted(self.support, hi, side="right")))
+        return ValueHistogram(self.support[a:b], self.cum[a : b + 1] - self.cum[a])
+
+    def counts(self, edges: Sequence[float]) -> np.ndarray:
+        """Counts per bin as np.histogram(values, bins=edges): half-open bins, last one closed."""
+        edges = np.asarray(edges, dtype=np.float64)
+        below = self.cum[np.searchsorted(self.support, edges, side="left")]
+        counts = np.diff(below)
+        if len(counts):
+            counts[-1] += self.cum[np.searchsorted(self.support, edges[-1], side="right")] - below[-1]
+        return counts
+
+
+@dataclass(frozen=True)
+class SortedIndex:
+    """
+    Row ids of a numeric column's valid cells, ordered by value.
+    ``keys`` are the sorted values and ``order`` the matching row ids,
+    so a closed range [lo, hi] is two binary searches and a slice.
+    ``rows`` is the dataset length it covers; merge() appends a later
+    block (its row ids are shifted past ``rows``).
+    """
+
+    keys: np.ndarray
+    order: np.ndarray
+    rows: int
+
+    @classmethod
+    def of(cls, values: np.ndarray) -> "SortedIndex":
+        valid = np.flatnonzero(~np.isnan(values))
+        order = valid[np.argsort(values[valid], kind="stable")]
+        keys = np.ascontiguousarray(values[order])
+        keys.flags.writeable = False
+        order.flags.writeable = False
+        return cls(keys, order, len(values))
+
+    def merge(self, other: "SortedIndex") -> "SortedIndex":
+        at = np.searchsorted(self.keys, other.keys, side="right")
+        keys = np.insert(self.keys, at, other.keys)
+        order = np.insert(self.order, at, other.order + self.rows)
+        keys.flags.writeable = False
+        order.flags.writeable = False
+        return SortedIndex(keys, order, self.rows + other.rows)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def span(self, lo: float, hi: float) -> slice:
+        """Positions in ``keys`` / ``order`` with lo <= value <= hi."""
+        start = int(np.searchsorted(self.keys, lo, side="left"))
+        stop = int(np.searchsorted(self.keys, hi, side="right"))
+        return slice(start, max(start, stop))
+
+    def rows_between(self, lo: float, hi: float) -> np.ndarray:
+        """Row ids with lo <= value <= hi, in value order (a read-only view)."""
+        return self.order[self.span(lo, hi)]
+
+
+@dataclass(frozen=True)
+class RangeSums:
+    """
+    Prefix sums and counts of a value column laid out in the order of
+    a SortedIndex, so sum / count / mean over any closed range of the
+    index column is two binary searches and two subtractions. Appends
+    insert rows mid-order, so these are rebuilt rather than merged.
+    """
+
+    index: SortedIndex
+    sums: np.ndarray
+    counts: np.ndarray
+
+    @classmethod
+    def of(cls, index: SortedIndex, values: np.ndarray) -> "RangeSums":
+        v = values[index.order]
+        ok = ~np.isnan(v)
+        sums = np.concatenate([[0.0], np.cumsum(np.where(ok, v, 0.0))])
+        counts = np.concatenate([[0], np.cumsum(ok, dtype=np.int64)])
+        sums.flags.writeable = False
+        counts.flags.writeable = False
+        return cls(index, sums, counts)
+
+    def count(self, lo: float, hi: float) -> int:
+        span = self.index.span(lo, hi)
+        return int(self.counts[span.stop] - self.counts[span.start])
+
+    def total(self, lo: float, hi: float) -> float:
+        span = self.index.span(lo, hi)
+        return float(self.sums[span.stop] - self.sums[span.start])
+
+    def mean(self, lo: float, hi: float) -> float | None:
+        n = self.count(lo, hi)
+        return self.total(lo, hi) / n if n else None
+
+
+@dataclass(frozen=True)
+class SamplePermutation:
+    """
+    One random order of a column's valid rows, stratified by equal-count
+    value buckets: every prefix holds each bucket in proportion. A
+    sample of k rows in [lo, hi] is the first k permuted rows in range,
+    so samples stay put as the range moves.
+    """
+
+    order: np.ndarray
+    keys: np.ndarray  # column value of each permuted row
+
+    @classmethod
+    def of(cls, index: SortedIndex, buckets: int = 20, seed: int = 42) -> "SamplePermutation":
+        n = len(index)
+        rng = np.random.default_rng(seed)
+        bucket = np.arange(n, dtype=np.int64) * buckets // max(n, 1)
+        shuffled = np.lexsort((rng.random(n), bucket))  # random order inside each bucket
+        sizes = np.bincount(bucket, minlength=buckets)
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        # systematic spread: k-th of m rows in a bucket lands at (k + u) / m
+        slot = (np.arange(n) - starts[bucket] + rng.random(n)) / np.maximum(sizes[bucket], 1)
+        pick = shuffled[np.argsort(slot, kind="stable")]
+        order = np.ascontiguousarray(index.order[pick])
+        keys = np.ascontiguousarray(index.keys[pick])
+        order.flags.writeable = False
+        keys.flags.writeable = False
+        return cls(order, keys)
+
+    def take(self, lo: float, hi: float, k: int) -> np.ndarray:
+        """The first ``k`` permuted row ids with lo <= value <= hi."""
+        found = []
+        need = k
+        step = max(4 * k, 1 << 16)
+        for start in range(0, len(self.order), step):
+            keys = self.keys[start : start + step]
+            hit = np.flatnonzero((keys >= lo) & (keys <= hi))[:need]
+            found.append(self.order[start + hit])
+            need -= len(hit)
+            if need <= 0:
+                break
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+
+def _sorted_quantiles(keys: np.ndarray, qs: Sequence[float]) -> np.ndarray:
+    """np.quantile (linear interpolation) of already sorted values; NaN when empty."""
+    qs = np.asarray(qs, dtype=np.float64)
+    if len(keys) == 0:
+        return np.full(qs.shape, np.nan)
+    h = (len(keys) - 1) * qs
+    i = np.floor(h).astype(np.int64)
+    j = np.minimum(i + 1, len(keys) - 1)
+    return keys[i] + (h - i) * (keys[j] - keys[i])
+
+
+@dataclass(frozen=True)
+class RangeQuantiles:
+    """
+    Exact quantiles of column ``y`` over closed ranges of column ``x``.
+    Rows are laid out in x order (``index``) as codes into y's sorted
+    distinct values; per-block prefix counts of those codes give the
+    value counts of any x range from two prefix rows plus at most two
+    partial blocks, and order statistics are read off their cumulative
+    sum. Columns with more than QUANTILE_MAX_SUPPORT distinct values
+    keep y in x order and fall back to np.quantile over the range.
+    """
+
+    index: SortedIndex
+    support: np.ndarray
+    codes: np.ndarray  # y value code per x-ordered row, -1 if y is missing
+    block: int
+    prefix: np.ndarray  # (blocks + 1) x len(support) cumulative counts
+    values: np.ndarray | None = None  # y in x order (fallback mode only)
+
+    @classmethod
+    def of(cls, index: SortedIndex, values: np.ndarray) -> "RangeQuantiles":
+        v = values[index.order]
+        ok = ~np.isnan(v)
+        support = np.unique(v[ok])
+        if len(support) > QUANTILE_MAX_SUPPORT:
+            return cls(index, support[:0], np.zeros(0, dtype=np.int32), 1, np.zeros((1, 0), dtype=np.int64), v)
+
+        codes = np.where(ok, np.searchsorted(support, np.where(ok, v, 0.0)), -1).astype(np.int32)
+        n, u = len(v), max(len(support), 1)
+        block = max(QUANTILE_BLOCK_ROWS, -(-n * u * 8 // QUANTILE_PREFIX_BYTES))
+        blocks = -(-n // block)
+        slot = (np.arange(n) // block) * u + codes
+        per_block = np.bincount(slot[ok], minlength=blocks * u).reshape(blocks, u)
+        prefix = np.vstack([np.zeros((1, u), dtype=np.int64), np.cumsum(per_block, axis=0)])
+        for arr in (support, codes, prefix):
+            arr.flags.writeable = False
+        return cls(index, support, codes, block, prefix)
+
+    def _counts(self, span: slice) -> np.ndarray:
+        """Count per support value over x-ordered positions ``span``."""
+        u = self.prefix.shape[1]
+
+        def partial(a: int, b: int) -> np.ndarray:
+            c = self.codes[a:b]
+            return np.bincount(c[c >= 0], minlength=u)
+
+        a, b = span.start, span.stop
+        first, last = -(-a // self.block), b // self.block
+        if first >= last:
+            return partial(a, b)
+        return self.prefix[last] - self.prefix[first] + partial(a, first * self.block) + partial(last * self.block, b)
+
+    def quantiles(self, lo: float, hi: float, qs: Sequence[float]) -> np.ndarray:
+        """Exact np.quantile of y over rows with lo <= x <= hi (NaN when empty)."""
+        span = self.index.span(lo, hi)
+        if self.values is not None:
+            v = self.values[span]
+            return _sorted_quantiles(np.sort(v[~np.isnan(v)]), qs)
+
+        cum = np.cumsum(self._counts(span))
+        total = int(cum[-1]) if len(cum) else 0
+        qs = np.asarray(qs, dtype=np.float64)
+        if total == 0:
+            return np.full(qs.shape, np.nan)
+        h = (total - 1) * qs
+        i = np.floor(h).astype(np.int64)
+        lower = self.support[np.searchsorted(cum, i, side="right")]
+        upper = self.support[np.searchsorted(cum, np.minimum(i + 1, total - 1), side="right")]
+        return lower + (h - i) * (upper - lower)
+
+
+def _compute_aggregate(key: tuple, values: Callable[[str], np.ndarray]):
+    """Build the aggregate named by ``key`` from per-column float arrays."""
+    if key[0] == "stats":
+        return ColumnStats.of(values(key[1]), key[2])
+    if key[0] == "sorted":
+        return SortedIndex.of(values(key[1]))
+    if key[0] == "hist":
+        return ValueHistogram.of(values(key[1]))
+    return BucketMeans.of(values(key[1]), values(key[2]), key[3])
+
+
+def _aggregate(
+    key: tuple, path: str | os.PathLike | None, columns: list[NumericColumn], compute: Callable[[], object] | None = None
+):
+    fp = file_fingerprint(path)
+    with _cache_lock:
+        entry = _cache.get(fp.path)
+        if entry is not None and entry.fingerprint == fp and key in entry.aggregates:
+            return entry.aggregates[key]
+    by_name = {num.name: num.values for num in columns}
+    agg = compute() if compute is not None else _compute_aggregate(key, by_name.__getitem__)
+    with _cache_lock:
+        entry = _cache.get(fp.path)
+        if entry is not None and entry.fingerprint == fp and all(len(n) == len(entry.numeric.get(n.name, ())) for n in columns):
+            agg = entry.aggregates.setdefault(key, agg)
+    return agg
+
+
+def column_stats(
+    name: str, path: str | os.PathLike | None = None, edges: Sequence[float] = ()
+) -> ColumnStats | None:
+    """Maintained ColumnStats of a column (physical or logical name); None if absent."""
+    num = numeric_column(name, path)
+    if num is None:
+        return None
+    return _aggregate(("stats", num.name, tuple(float(e) for e in edges)), path, [num])
+
+
+def bucket_means(
+    x: str, y: str, edges: Sequence[float], path: str | os.PathLike | None = None
+) -> BucketMeans | None:
+    """Maintained per-bucket means of column ``y`` over buckets of column ``x``."""
+    xs, ys = numeric_column(x, path), numeric_column(y, path)
+    if xs is None or ys is None:
+        return None
+    return _aggregate(("buckets", xs.name, ys.name, tuple(float(e) for e in edges)), path, [xs, ys])
+
+
+def value_histogram(
+    name: str, path: str | os.PathLike | None = None, values: np.ndarray | None = None
+) -> ValueHistogram | None:
+    """
+    Maintained ValueHistogram of a numeric column. ``values`` supplies a
+    derived row-ordered array instead (e.g. standardized scores); ``name``
+    then only names it, and it is rebuilt rather than merged on append.
+    """
+    if values is None:
+        num = numeric_column(name, path)
+        if num is None:
+            return None
+        return _aggregate(("hist", num.name), path, [num])
+    return _aggregate(("derived", "hist", name, len(values)), path, [], lambda: ValueHistogram.of(values))
+
+
+def sorted_index(name: str, path: str | os.PathLike | None = None) -> SortedIndex | None:
+    """Maintained value-ordered index of a numeric column (e.g. "distance"); None if absent."""
+    num = numeric_column(name, path)
+    if num is None:
+        return None
+    return _aggregate(("sorted", num.name), path, [num])
+
+
+def range_sums(
+    x: str, y: str, path: str | os.PathLike | None = None, values: np.ndarray | None = None
+) -> RangeSums | None:
+    """
+    Prefix sums of column ``y`` in ``x`` order, for O(log n) range
+    KPIs such as ``range_sums("distance", "Seat comfort").mean(lo, hi)``.
+    ``values`` supplies a derived row-ordered array (e.g. simulated
+    fuel) instead of a dataset column; ``y`` then only names it.
+    """
+    index = sorted_index(x, path)
+    if index is None:
+        return None
+    if values is not None:
+        if len(values) != index.rows:
+            raise ValueError(f"values for {y!r} have {len(values)} rows, dataset has {index.rows}")
+        name = y
+    else:
+        ys = numeric_column(y, path)
+        if ys is None:
+            return None
+        name, values = ys.name, ys.values
+    xs = numeric_column(x, path)
+    return _aggregate(("prefix", xs.name, name), path, [xs], lambda: RangeSums.of(index, values))
+
+
+def quantiles(name: str, qs: Sequence[float], path: str | os.PathLike | None = None) -> np.ndarray | None:
+    """Exact quantiles (np.quantile, linear) of a numeric column from its sorted index."""
+    index = sorted_index(name, path)
+    return None if index is None else _sorted_quantiles(index.keys, qs)
+
+
+def range_quantiles(x: str, y: str, path: str | os.PathLike | None = None) -> RangeQuantiles | None:
+    """
+    Stored RangeQuantiles of column ``y`` over ranges of column ``x``,
+    e.g. ``range_quantiles("distance", "dep_delay").quantiles(lo, hi, [0.5, 0.9])``.
+    """
+    index = sorted_index(x, path)
+    ys = numeric_column(y, path)
+    if index is None or ys is None:
+        return None
+    xs = numeric_column(x, path)
+    return _aggregate(("quantile", xs.name, ys.name), path, [xs, ys], lambda: RangeQuantiles.of(index, ys.values))
+
+
+def sample_permutation(
+    name: str, path: str | os.PathLike | None = None, buckets: int = 20, seed: int = 42
+) -> SamplePermutation | None:
+    """Stored stratified random order of a numeric column's valid rows; None if absent."""
+    index = sorted_index(name, path)
+    if index is None:
+        return None
+    num = numeric_column(name, path)
+    return _aggregate(("sample", num.name, buckets, seed), path, [num], lambda: SamplePermutation.of(index, buckets, seed))
+
+
+# ============================================================
+# Streaming batches (bounded memory)
+# ============================================================
+def _rebatch(frames: Iterator[pd.DataFrame], batch_size: int) -> Iterator[pd.DataFrame]:
+    """Re-cut a stream of frames into exact ``batch_size`` chunks (last may be shorter)."""
+    pending: list[pd.DataFrame] = []
+    pending_rows = 0
+    for frame in frames:
+        while len(frame):
+            take = min(batch_size - pending_rows, len(frame))
+            pending.append(frame.iloc[:take])
+            pending_rows += take
+            frame = frame.iloc[take:]
+            if pending_rows == batch_size:
+                yield pending[0] if len(pending) == 1 else pd.concat(pending)
+                pending, pending_rows = [], 0
+    if pending_rows:
+        yield pending[0] if len(pending) == 1 else pd.concat(pending)
+
+
+def _iter_sidecar_frames(data_path: Path, fmt: str, columns: list[str], batch_size: int) -> Iterator[pd.DataFrame]:
+    if fmt == "feather":
+        import pyarrow as pa
+
+        with pa.memory_map(str(data_path)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).select(columns).to_pandas()
+    elif fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(data_path).iter_batches(batch_size=batch_size, columns=columns):
+                yield batch.to_pandas()
+        except ImportError:
+            from fastparquet import ParquetFile
+
+            yield from ParquetFile(str(data_path)).iter_row_groups(columns=columns)
+    else:
+        raise ValueError(f"format {fmt!r} cannot be streamed")
+
+
+def _iter_csv_frames(csv_path: Path, columns: list[str], batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    CSV chunks in the declared schema. If a chunk breaks the strict
+    dtypes, the rest of the file is streamed with per-chunk coercion
+    (so a column may come back as float32 instead of int there).
+    """
+    specs = {c: DATASET_SCHEMA[c] for c in columns if c in DATASET_SCHEMA}
+    done = 0
+    try:
+        strict = {c: spec.dtype for c, spec in specs.items()}
+        with pd.read_csv(csv_path, usecols=columns, dtype=strict, chunksize=batch_size) as reader:
+            for chunk in reader:
+                problems = validate_schema(chunk)
+                if problems:
+                    raise ValueError("; ".join(problems))
+                yield chunk
+                done += len(chunk)
+        return
+    except (ValueError, TypeError, OverflowError) as exc:
+        logger.warning("Strict schema stream of %s rejected at row %d (%s); coercing", csv_path.name, done, exc)
+
+    categorical = {c: "category" for c, spec in specs.items() if spec.dtype == "category"}
+    # a callable keeps memory flat (a range would be materialised as a set of row numbers)
+    with pd.read_csv(
+        csv_path, usecols=columns, dtype=categorical, chunksize=batch_size, skiprows=lambda i: 0 < i <= done
+    ) as reader:
+        for chunk in reader:
+            for col, spec in specs.items():
+                chunk[col] = _coerce_to_spec(chunk[col], spec)
+            yield chunk
+
+
+def _iter_partition_frames(
+    fp: Fingerprint, columns: list[str], filters: Mapping[str, object] | None
+) -> Iterator[pd.DataFrame]:
+    all_parts = list_partitions(fp.path)
+    categories = _partition_categories(all_parts)
+    file_columns = [c for c in columns if c not in categories]
+    for part in _select_partitions(all_parts, filters):
+        frame = _read_partition_file(str(part.file), part.fmt, file_columns)
+        yield _with_partition_columns(frame, part, columns, categories).reindex(columns=columns)
+
+
+def iter_batches(
+    batch_size: int,
+    columns: Sequence[str] | None = None,
+    path: str | os.PathLike | None = None,
+    filters: Mapping[str, object] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the dataset as typed chunks of ``batch_size`` rows, in file order.
+
+    Memory stays bounded by the batch size: chunks come from the
+    in-process cache when those columns are already loaded, otherwise
+    from the binary sidecar's record batches / row groups, otherwise
+    from CSV chunks. Each chunk's index holds global row numbers.
+    ``columns`` accepts the same physical / logical names as load_data();
+    partitioned datasets are streamed file by file after ``filters`` pruning.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+
+    fp = file_fingerprint(path)
+    if filters and not fp.parts:
+        raise ValueError("filters select partitions; this dataset is a single file")
+    with _cache_lock:
+        entry = _cache.get(fp.path + _filters_key(filters))
+        if entry is not None and entry.fingerprint != fp:
+            entry = None
+        header = entry.header if entry is not None else _read_header(fp)
+        wanted = list(header) if columns is None else resolve_columns(header, columns)
+        cached = None
+        if entry is not None and all(c in entry.columns for c in wanted):
+            cached = pd.DataFrame({c: entry.columns[c] for c in wanted}, copy=False)
+
+    if cached is not None:
+        for start in range(0, len(cached), batch_size):
+            yield cached.iloc[start : start + batch_size]
+        return
+
+    csv_path = Path(fp.path)
+    meta = _load_sidecar_meta(csv_path) if not fp.parts else None
+    if fp.parts:
+        frames = _iter_partition_frames(fp, wanted, filters)
+    elif _sidecar_is_current(meta, fp) and meta["format"] in ("feather", "parquet"):
+        frames = _iter_sidecar_frames(csv_path.with_name(meta["file"]), meta["format"], wanted, batch_size)
+    else:
+        frames = _iter_csv_frames(csv_path, wanted, batch_size)
+
+    start = 0
+    for chunk in _rebatch(frames, batch_size):
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+# ============================================================
+# Data-quality profile
+# ============================================================
+PROFILE_VERSION = 1
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def _popcount_range(bits: np.ndarray, start: int, stop: int) -> int:
+    """Set bits among positions [start, stop) of an np.packbits (MSB-first) bitmap."""
+    if stop <= start:
+        return 0
+    first, last = start // 8, (stop - 1) // 8
+    head = 0xFF >> (start % 8)
+    tail = (0xFF << (7 - (stop - 1) % 8)) & 0xFF
+    if first == last:
+        return int(_POPCOUNT[bits[first] & head & tail])
+    inner = int(_POPCOUNT[bits[first + 1 : last]].sum())
+    return int(_POPCOUNT[bits[first] & head]) + inner + int(_POPCOUNT[bits[last] & tail])
+
+
+@dataclass(frozen=True)
+class ColumnProfile:
+    """Quality facts of one column; ``null_bitmap`` is np.packbits of its null mask (row order)."""
+
+    name: str
+    dtype: str
+    rows: int
+    nulls: int
+    null_bitmap: np.ndarray
+    minimum: float | None
+    maximum: float | None
+    distinct: int
+    coercion_failures: int
+
+    def nulls_in(self, start: int, stop: int) -> int:
+        """Null cells among rows [start, stop)."""
+        return _popcount_range(self.null_bitmap, max(start, 0), min(stop, self.rows))
+
+
+@dataclass
+class DatasetProfile:
+    """Column profiles computed so far for one dataset version."""
+
+    fingerprint: Fingerprint
+    rows: int
+    columns: dict[str, ColumnProfile] = field(default_factory=dict)
+
+    def missing_cells(self) -> int:
+        return sum(p.nulls for p in self.columns.values())
+
+    def missing_in(self, start: int, stop: int) -> int:
+        """Missing cells of rows [start, stop) over all profiled columns."""
+        return sum(p.nulls_in(start, stop) for p in self.columns.values())
+
+    def to_frame(self) -> pd.DataFrame:
+        rows = [
+            {
+                "Column": p.name,
+                "Dtype": p.dtype,
+                "Nulls": p.nulls,
+                "Min": p.minimum,
+                "Max": p.maximum,
+                "Distinct": p.distinct,
+                "Coercion Failures": p.coercion_failures,
+            }
+            for p in self.columns.values()
+        ]
+        return pd.DataFrame(rows).set_index("Column") if rows else pd.DataFrame()
+
+
+def _column_facts(s: pd.Series) -> tuple[np.ndarray, float | None, float | None, int]:
+    """(null mask, min, max, coercion failures) of one column or batch."""
+    isna = s.isna().to_numpy()
+    minimum = maximum = None
+    failures = 0
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        values = to_float_array(s)
+        if (~np.isnan(values)).any():
+            minimum, maximum = float(np.nanmin(values)), float(np.nanmax(values))
+    else:
+        spec = DATASET_SCHEMA.get(str(s.name))
+        if spec is not None and spec.dtype != "category":
+            # text left in a declared-numeric column
+            failures = int((~isna & pd.to_numeric(s.astype(str), errors="coerce").isna().to_numpy()).sum())
+    return isna, minimum, maximum, failures
+
+
+def _profile_column(s: pd.Series) -> ColumnProfile:
+    isna, minimum, maximum, failures = _column_facts(s)
+    bitmap = np.packbits(isna)
+    bitmap.flags.writeable = False
+    return ColumnProfile(
+        str(s.name), str(s.dtype), len(s), int(isna.sum()), bitmap, minimum, maximum, int(s.nunique()), failures
+    )
+
+
+class _ColumnProfiler:
+    """Folds batches of one column into a ColumnProfile; the null bitmap is packed as it grows."""
+
+    def __init__(self, name: str) -> None:
+        self.name, self.dtype = name, ""
+        self.rows = self.nulls = self.failures = 0
+        self.minimum: float | None = None
+        self.maximum: float | None = None
+        self.distinct: set = set()
+        self.bits: list[np.ndarray] = []
+        self.carry = np.zeros(0, dtype=bool)  # < 8 mask bits not packed yet
+
+    def update(self, s: pd.Series) -> None:
+        isna, minimum, maximum, failures = _column_facts(s)
+        self.dtype = str(s.dtype)
+        self.rows += len(s)
+        self.nulls += int(isna.sum())
+        self.failures += failures
+        if minimum is not None:
+            self.minimum = minimum if self.minimum is None else min(self.minimum, minimum)
+            self.maximum = maximum if self.maximum is None else max(self.maximum, maximum)
+        self.distinct.update(s.dropna().unique().tolist())
+        pending = np.concatenate([self.carry, isna])
+        whole = len(pending) - len(pending) % 8
+        self.bits.append(np.packbits(pending[:whole]))
+        self.carry = pending[whole:]
+
+    def result(self) -> ColumnProfile:
+        bitmap = np.concatenate([*self.bits, np.packbits(self.carry)])
+        bitmap.flags.writeable = False
+        return ColumnProfile(
+            self.name, self.dtype, self.rows, self.nulls, bitmap,
+            self.minimum, self.maximum, len(self.distinct), self.failures,
+        )
+
+
+def _profile_path(fp: Fingerprint) -> Path:
+    csv_path = Path(fp.path)
+    return csv_path.with_name(csv_path.stem + ".profile.npz")
+
+
+def _read_profile(fp: Fingerprint) -> DatasetProfile | None:
+    try:
+        with np.load(_profile_path(fp), allow_pickle=False) as z:
+            meta = json.loads(str(z["__profile__"]))
+            if meta.get("version") != PROFILE_VERSION or meta.get("source") != [fp.size, fp.mtime_ns]:
+                return None
+            profile = DatasetProfile(fp, meta["rows"])
+            for i, col in enumerate(meta["columns"]):
+                bitmap = z[f"b{i}"]
+                bitmap.flags.writeable = False
+                profile.columns[col["name"]] = ColumnProfile(null_bitmap=bitmap, **col)
+            return profile
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_profile(profile: DatasetProfile) -> None:
+    fp = profile.fingerprint
+    columns = list(profile.columns.values())
+    meta = {
+        "version": PROFILE_VERSION,
+        "source": [fp.size, fp.mtime_ns],
+        "rows": profile.rows,
+        "columns": [{k: v for k, v in p.__dict__.items() if k != "null_bitmap"} for p in columns],
+    }
+    arrays = {f"b{i}": p.null_bitmap for i, p in enumerate(columns)}
+
+    def write(tmp: Path) -> None:
+        with open(tmp, "wb") as fh:
+            np.savez(fh, __profile__=np.asarray(json.dumps(meta)), **arrays)
+
+    try:
+        atomic_write(_profile_path(fp), write)
+    except OSError as exc:  # read-only deploys keep the in-memory profile
+        logger.warning("Could not write profile for %s: %s", fp.path, exc)
+
+
+_profiles: dict[str, DatasetProfile] = {}
+
+
+def data_profile(
+    path: str | os.PathLike | None = None, columns: Sequence[str] | None = None, batch_size: int | None = None
+) -> DatasetProfile:
+    """
+    Quality profile of ``columns`` (default: all) for the current dataset
+    version. Computed once, kept in memory and saved next to the CSV;
+    later calls and restarts only look it up.
+
+    With ``batch_size``, missing columns are profiled from iter_batches()
+    chunks instead of load_data(), so building the profile holds one
+    batch (plus the profile itself) in memory.
+    """
+    fp = file_fingerprint(path)
+    with _cache_lock:
+        profile = _profiles.get(fp.path)
+    if profile is None or profile.fingerprint != fp:
+        profile = (None if fp.parts else _read_profile(fp)) or DatasetProfile(fp, -1)
+
+    header = _read_header(fp)
+    wanted = list(header) if columns is None else resolve_columns(header, columns)
+    missing = [c for c in wanted if c not in profile.columns]
+    if missing and batch_size:
+        profilers = {col: _ColumnProfiler(col) for col in missing}
+        for chunk in iter_batches(batch_size, columns=missing, path=path):
+            for col, profiler in profilers.items():
+                profiler.update(chunk[col])
+        for col, profiler in profilers.items():
+            profile.columns[col] = profiler.result()
+        profile.rows = profilers[missing[0]].rows
+    elif missing:
+        df = load_data(path, columns=missing)
+        profile.rows = len(df)
+        for col in missing:
+            profile.columns[col] = _profile_column(df[col])
+    if missing:
+        # keep header order so missing_cells() sums in a stable order
+        profile.columns = {c: profile.columns[c] for c in header if c in profile.columns}
+        if not fp.parts:
+            _write_profile(profile)
+
+    with _cache_lock:
+        _profiles[fp.path] = profile
+    return profile
+
+
+# ============================================================
+# Mergeable co-moments (covariance / correlation)
+# ============================================================
+# Default columns for the correlation view: distance, both delays, ratings
+CORRELATION_FIELDS = ["distance", "dep_delay", "arr_delay", *SERVICE_RATING_COLUMNS]
+COMOMENT_BLOCK_BYTES = 32 * 1024 * 1024  # CSV bytes parsed at a time per worker
+
+
+@dataclass(frozen=True)
+class CoMoments:
+    """
+    Pairwise-complete co-moments of k numeric columns: for every pair
+    (i, j), over the rows where both are present, the count ``n``, the
+    mean of column i (``mean[i, j]``), its sum of squared deviations
+    (``m2[i, j]``) and the co-moment ``c[i, j]``. States of two row
+    blocks merge() exactly (Chan et al.), so batches can be folded in
+    any grouping, including across processes.
+    """
+
+    columns: tuple[str, ...]
+    n: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    c: np.ndarray
+
+    @classmethod
+    def empty(cls, columns: Sequence[str]) -> "CoMoments":
+        k = len(columns)
+        zeros = np.zeros((k, k))
+        return cls(tuple(columns), zeros.copy(), zeros.copy(), zeros.copy(), zeros.copy())
+
+    @classmethod
+    def of(cls, columns: Sequence[str], x: np.ndarray) -> "CoMoments":
+        """State of one block; ``x`` is rows x k float64 with NaN for missing."""
+        valid = ~np.isnan(x)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shift = np.where(valid.any(axis=0), np.nanmean(np.where(valid, x, np.nan), axis=0), 0.0)
+            y = np.where(valid, x - shift, 0.0)
+            v = valid.astype(np.float64)
+            n = v.T @ v
+            s = y.T @ v  # s[i, j]: sum of shifted x_i where i and j are present
+            safe = np.maximum(n, 1)
+            mean = np.where(n > 0, s / safe + shift[:, None], 0.0)
+            m2 = np.where(n > 0, (y * y).T @ v - s * s / safe, 0.0)
+            c = np.where(n > 0, y.T @ y - s * s.T / safe, 0.0)
+        return cls(tuple(columns), n, mean, np.maximum(m2, 0.0), c)
+
+    def merge(self, other: "CoMoments") -> "CoMoments":
+        n = self.n + other.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            w = np.where(n > 0, self.n * other.n / np.maximum(n, 1), 0.0)
+            d = other.mean - self.mean
+            mean = np.where(n > 0, self.mean + d * other.n / np.maximum(n, 1), 0.0)
+        return CoMoments(
+            self.columns,
+            n,
+            mean,
+            self.m2 + other.m2 + d * d * w,
+            self.c + other.c + d * d.T * w,
+        )
+
+    def covariance(self, ddof: int = 1) -> pd.DataFrame:
+        """Pairwise-complete covariance (as DataFrame.cov)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = np.where(self.n - ddof > 0, self.c / (self.n - ddof), np.nan)
+        return pd.DataFrame(cov, index=list(self.columns), columns=list(self.columns))
+
+    def correlation(self) -> pd.DataFrame:
+        """Pairwise-complete Pearson correlation (as DataFrame.corr)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.c / np.sqrt(self.m2 * self.m2.T)
+        corr = np.clip(np.where(self.n > 1, corr, np.nan), -1.0, 1.0)
+        return pd.DataFrame(corr, index=list(self.columns), columns=list(self.columns))
+
+
+def _frame_matrix(frame: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    return np.column_stack([to_float_array(frame[c]) for c in columns]) if len(frame) else np.zeros((0, len(columns)))
+
+
+def _comoments_range(path: str, start: int, end: int, names: list[str], columns: list[str]) -> CoMoments:
+    """Process-pool worker: co-moments of one byte range, parsed block by block."""
+    state = CoMoments.empty(columns)
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        carry = b""
+        while start < end:
+            data = carry + fh.read(min(COMOMENT_BLOCK_BYTES, end - start))
+            start = fh.tell()
+            cut = len(data) if start >= end else data.rfind(b"\n") + 1
+            if cut == 0:  # no full line yet
+                carry = data
+                continue
+            block, carry = data[:cut], data[cut:]
+            frame = _parse_csv(block, usecols=columns, names=names, label=f"{Path(path).name}[..{start}]")
+            state = state.merge(CoMoments.of(columns, _frame_matrix(frame, columns)))
+    return state
+
+
+_comoments: dict[tuple[str, tuple[str, ...]], tuple[Fingerprint, CoMoments]] = {}
+
+
+def comoments(
+    columns: Sequence[str] | None = None,
+    path: str | os.PathLike | None = None,
+    workers: int | None = None,
+    batch_size: int = 250_000,
+) -> CoMoments:
+    """
+    Co-moments of ``columns`` (default: CORRELATION_FIELDS present in the
+    dataset) in one pass with bounded memory, kept per dataset version.
+    Columns already held as numeric arrays are read from memory; a
+    single CSV with ``workers`` > 1 (default: CSV_WORKERS) is split into
+    the same newline-aligned byte ranges as a parallel parse, one
+    process per range; otherwise iter_batches() chunks are folded.
+    """
+    fp = file_fingerprint(path)
+    header = _read_header(fp)
+    wanted = resolve_columns(header, CORRELATION_FIELDS if columns is None else columns)
+    key = (fp.path, tuple(wanted))
+    with _cache_lock:
+        hit = _comoments.get(key)
+        entry = _cache.get(fp.path)
+        arrays = None
+        if entry is not None and entry.fingerprint == fp and all(c in entry.numeric for c in wanted):
+            arrays = [entry.numeric[c].values for c in wanted]
+    if hit is not None and hit[0] == fp:
+        return hit[1]
+
+    workers = CSV_WORKERS if workers is None else workers
+    state = CoMoments.empty(wanted)
+    if arrays is not None:
+        for start in range(0, len(arrays[0]) if arrays else 0, batch_size):
+            block = np.column_stack([a[start : start + batch_size] for a in arrays])
+            state = state.merge(CoMoments.of(wanted, block))
+    elif not fp.parts and workers > 1 and Path(fp.path).stat().st_size >= PARALLEL_MIN_BYTES:
+        names, ranges = _byte_ranges(Path(fp.path), workers)
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=ctx) as pool:
+            futures = [pool.submit(_comoments_range, fp.path, a, b, names, wanted) for a, b in ranges]
+            for future in futures:
+                state = state.merge(future.result())
+    else:
+        for chunk in iter_batches(batch_size, columns=wanted, path=path):
+            state = state.merge(CoMoments.of(wanted, _frame_matrix(chunk, wanted)))
+
+    with _cache_lock:
+        _comoments[key] = (fp, state)
+    return state
+
+
+def correlation_matrix(
+    columns: Sequence[str] | None = None, path: str | os.PathLike | None = None, workers: int | None = None
+) -> pd.DataFrame:
+    """Pairwise-complete Pearson correlation of ``columns`` from comoments()."""
+    return comoments(columns, path, workers).correlation()
+
+
+# ============================================================
+# Background warm-up
+# ============================================================
+# Numeric arrays every module reads first; other columns are coerced on demand
+WARMUP_NUMERIC_FIELDS = ["distance", "dep_delay", "arr_delay"]
+
+_warmup_lock = threading.Lock()
+_warmups: dict[str, tuple[Fingerprint, Future, float]] = {}
+_warmup_local = threading.local()
+
+
+def warm_up(path: str | os.PathLike | None = None) -> Future:
+    """
+    Load the full dataset, its numeric arrays and content hash on a
+    daemon thread. Idempotent per dataset version: repeated calls (every
+    Streamlit rerun) return the same Future, which resolves to
+    {"rows", "columns", "ms"}.
+    """
+    fp = file_fingerprint(path)
+    with _warmup_lock:
+        current = _warmups.get(fp.path)
+        if current is not None and current[0] == fp and not (current[1].done() and current[1].exception()):
+            return current[1]
+        future: Future = Future()
+        _warmups[fp.path] = (fp, future, time.perf_counter())
+
+    threading.Thread(target=_run_warmup, args=(path, future), name="sia-warmup", daemon=True).start()
+    return future
+
+
+def _run_warmup(path: str | os.PathLike | None, future: Future) -> None:
+    _warmup_local.active = True
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        t0 = time.perf_counter()
+        df = load_data(path)
+        for name in WARMUP_NUMERIC_FIELDS:
+            numeric_column(name, path)
+        content_fingerprint(path)
+        future.set_result({"rows": len(df), "columns": len(df.columns), "ms": (time.perf_counter() - t0) * 1000.0})
+    except Exception as exc:
+        logger.warning("Dataset warm-up failed: %s", exc)
+        future.set_exception(exc)
+
+
+def _await_warmup(fp: Fingerprint) -> None:
+    """Block until an in-flight warm-up of this dataset version finishes (errors are ignored)."""
+    if getattr(_warmup_local, "active", False):
+        return
+    with _warmup_lock:
+        current = _warmups.get(fp.path)
+    if current is None or current[0] != fp or current[1].done():
+        return
+    try:
+        current[1].result()
+    except Exception:
+        pass  # the caller loads for itself
+
+
+def warmup_status(path: str | os.PathLike | None = None) -> dict:
+    """
+    State of the background warm-up: "idle" (never started), "warming",
+    "ready" (with rows / columns / ms) or "failed" (with error).
+    """
+    key = str(_resolve_path(path).resolve())
+    with _warmup_lock:
+        current = _warmups.get(key)
+    if current is None:
+        return {"state": "idle"}
+    _, future, started = current
+    if not future.done():
+        return {"state": "warming", "elapsed_ms": (time.perf_counter() - started) * 1000.0}
+    if future.exception() is not None:
+        return {"state": "failed", "error": str(future.exception())}
+    return {"state": "ready", **future.result()}
+
+
+def ingestion_info(path: str | os.PathLike | None = None) -> dict:
+    """
+    Describe the last disk load of a dataset: sidecar format, CSV parse
+    time and sidecar read time (ms, None if never measured), and which
+    source was used ("csv" or "sidecar").
+    """
+    key = str(_resolve_path(path).resolve())
+    with _cache_lock:
+        info = _ingestion_info.get(key)
+        if info is None:
+            info = _load_sidecar_meta(Path(key)) or {}
+        return dict(info)
+
+
+def cache_stats() -> dict[str, int]:
+    """Return hit / miss / reload counters of the dataset cache."""
+    with _cache_lock:
+        return dict(_cache_stats)
+
+
+def clear_cache() -> None:
+    """Drop every cached dataset (counters are kept)."""
+    with _cache_lock:
+        _cache.clear()
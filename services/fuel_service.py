@@ -0,0 +1,206 @@
+# ============================================================
+# fuel_service.py – Simulated fuel consumption models
+#
+# Fuel is not in the dataset, so Module 1 estimates it from flight
+# distance (academic estimation). Models are registered by name and
+# evaluated as one vectorized pass over the distance array:
+#   linear     – constant kg per km
+#   piecewise  – kg per km by distance band (short hops burn more)
+#   class      – linear, scaled by cabin class
+#
+# Every model multiplies by per-row noise keyed by row id
+# (row_uniform), so any subset of rows can be estimated on its own,
+# including rows fetched elsewhere (e.g. from SQLite) as a ``frame``.
+# Full-dataset results are separate arrays cached per (model, params,
+# dataset content) in memory and in the artifact store; the dataset
+# frame itself is never modified.
+# ============================================================
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from services.artifact_service import cached_artifact
+from services.data_service import content_fingerprint, load_data, numeric_column, schema_map, to_float_array
+
+FUEL_SEED = 42
+FUEL_NOISE = (0.9, 1.1)  # multiplicative, uniform per row
+DEFAULT_FUEL_MODEL = "linear"
+
+
+# ============================================================
+# Counter-based random numbers
+# ============================================================
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer over a uint64 array (wrapping arithmetic)."""
+    with np.errstate(over="ignore"):
+        x = x + _GOLDEN
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def row_uniform(rows: np.ndarray | int, seed: int, low: float = 0.0, high: float = 1.0) -> np.ndarray:
+    """
+    Uniform draws in [low, high) keyed by (row id, seed): row i gets the
+    same value whether it is computed alone, in a chunk, in a filtered
+    subset or for the whole dataset. ``rows`` may be a row count.
+    """
+    rows = np.arange(rows) if np.isscalar(rows) else np.asarray(rows)
+    key = _splitmix64(np.asarray([seed], dtype=np.uint64))[0]
+    bits = _splitmix64(rows.astype(np.uint64) ^ key)
+    return low + (high - low) * ((bits >> np.uint64(11)).astype(np.float64) * 2.0**-53)
+
+
+@dataclass(frozen=True)
+class FuelModel:
+    """A named, vectorized fuel estimator: ``fn(distance, inputs, params) -> kg``."""
+
+    name: str
+    label: str
+    fn: Callable[[np.ndarray, Mapping[str, np.ndarray], Mapping[str, object]], np.ndarray]
+    defaults: Mapping[str, object] = field(default_factory=dict)
+    fields: tuple[str, ...] = ()  # extra logical fields the model reads
+
+
+FUEL_MODELS: dict[str, FuelModel] = {}
+
+
+def register_fuel_model(name: str, label: str, defaults: Mapping[str, object] | None = None, fields: tuple[str, ...] = ()):
+    """Decorator adding a model function to FUEL_MODELS."""
+
+    def wrap(fn):
+        FUEL_MODELS[name] = FuelModel(name, label, fn, dict(defaults or {}), tuple(fields))
+        return fn
+
+    return wrap
+
+
+@register_fuel_model("linear", "Linear (kg per km)", {"rate": 0.05})
+def _linear(distance: np.ndarray, inputs: Mapping[str, np.ndarray], params: Mapping[str, object]) -> np.ndarray:
+    return distance * float(params["rate"])
+
+
+@register_fuel_model(
+    "piecewise",
+    "Piecewise by distance band",
+    {"bands": [0.0, 800.0, 2500.0], "rates": [0.065, 0.05, 0.044]},
+)
+def _piecewise(distance: np.ndarray, inputs: Mapping[str, np.ndarray], params: Mapping[str, object]) -> np.ndarray:
+    # band i covers [bands[i], bands[i+1]); the last band is open-ended
+    band = np.searchsorted(np.asarray(params["bands"], dtype=float), distance, side="right") - 1
+    rates = np.asarray(params["rates"], dtype=float)
+    return distance * rates[np.clip(band, 0, len(rates) - 1)]
+
+
+@register_fuel_model(
+    "class",
+    "Class-aware (cabin mix)",
+    {"rate": 0.05, "factors": {"Eco": 1.0, "Eco Plus": 1.1, "Business": 1.35}},
+    fields=("class",),
+)
+def _class_aware(distance: np.ndarray, inputs: Mapping[str, np.ndarray], params: Mapping[str, object]) -> np.ndarray:
+    return distance * float(params["rate"]) * inputs["class"]
+
+
+def _class_factors(
+    factors: Mapping[str, float],
+    rows: np.ndarray,
+    path: str | os.PathLike | None = None,
+    frame: pd.DataFrame | None = None,
+) -> np.ndarray:
+    """Cabin multipliers for ``rows`` via category codes (1.0 for unknown / missing classes)."""
+    col = schema_map(path).get("class")
+    if col is None:
+        return np.ones(len(rows))
+    if frame is not None:
+        cls, rows = frame[col], np.arange(len(frame))
+    else:
+        cls = load_data(path, columns=[col])[col]
+    cat = cls.array if isinstance(cls.dtype, pd.CategoricalDtype) else pd.Categorical(cls)
+    lookup = np.append([float(factors.get(str(c), 1.0)) for c in cat.categories], 1.0)  # code -1 -> last
+    return lookup[np.asarray(cat.codes)[rows]]
+
+
+def fuel_fields(model: str) -> list[str]:
+    """Logical fields a model reads (distance plus its extra fields)."""
+    return ["distance", *FUEL_MODELS[model].fields]
+
+
+def fuel_params(model: str, params: Mapping[str, object] | None = None) -> dict[str, object]:
+    """Model defaults overridden by ``params``, plus the shared noise settings."""
+    if model not in FUEL_MODELS:
+        raise KeyError(f"unknown fuel model {model!r}; choose from {sorted(FUEL_MODELS)}")
+    return {**FUEL_MODELS[model].defaults, **dict(params or {}), "seed": FUEL_SEED, "noise": list(FUEL_NOISE)}
+
+
+def _evaluate(
+    model: str,
+    params: Mapping[str, object],
+    rows: np.ndarray | None,
+    path: str | os.PathLike | None = None,
+    frame: pd.DataFrame | None = None,
+) -> np.ndarray:
+    spec = FUEL_MODELS[model]
+    if frame is not None:
+        ids = frame.index.to_numpy()
+        distance = to_float_array(frame[schema_map(path).require("distance")])
+    else:
+        distance = numeric_column("distance", path).values
+        ids = np.arange(len(distance)) if rows is None else np.asarray(rows)
+        if rows is not None:
+            distance = distance[ids]
+    inputs = {}
+    if "class" in spec.fields:
+        inputs["class"] = _class_factors(params["factors"], ids, path, frame)
+    noise = row_uniform(ids, int(params["seed"]), *params["noise"])
+    return spec.fn(distance, inputs, params) * noise
+
+
+_memo_lock = threading.Lock()
+_memo: dict[tuple[str, str, str], np.ndarray] = {}
+_MEMO_SIZE = 8  # full-length arrays kept in memory (one per model / params)
+
+
+def estimate_fuel(
+    model: str = DEFAULT_FUEL_MODEL,
+    params: Mapping[str, object] | None = None,
+    rows: np.ndarray | None = None,
+    path: str | os.PathLike | None = None,
+    frame: pd.DataFrame | None = None,
+) -> np.ndarray:
+    """
+    Simulated fuel (kg) per row. With ``rows`` only those rows are
+    computed (same values as the full array); with ``frame`` (indexed by
+    dataset row number, holding fuel_fields(model)) its rows are computed
+    from its own columns without touching the dataset cache. Otherwise
+    the full-length array is served from the in-memory / artifact cache.
+    """
+    params = fuel_params(model, params)
+    if rows is not None or frame is not None:
+        return _evaluate(model, params, rows, path, frame)
+
+    key = (model, json.dumps(params, sort_keys=True), content_fingerprint(path))
+    with _memo_lock:
+        hit = _memo.get(key)
+    if hit is not None:
+        return hit
+
+    values = cached_artifact(f"fuel.{model}", {**params, "rng": "splitmix64"}, lambda: _evaluate(model, params, None, path), path)
+    values = np.asarray(values, dtype=np.float64)
+    values.flags.writeable = False
+    with _memo_lock:
+        _memo[key] = values
+        while len(_memo) > _MEMO_SIZE:
+            _memo.pop(next(iter(_memo)))
+    return values
@@ -0,0 +1,187 @@
+# ============================================================
+# generator_service.py – Synthetic passenger data for load tests
+#
+# Writes CSVs with the train.csv header (DATASET_SCHEMA order) at
+# any size, so Modules 1–4 can be exercised at 1M–100M rows:
+#   python Dashboard.py generate --rows 10000000 --out assets/big.csv
+#
+# Rows are generated in fixed-size chunks from a vectorized RNG seeded
+# by (seed, first row), so the file is identical for any worker
+# count. Workers format chunks as CSV bytes; the parent appends them in
+# order with a bounded number in flight, so memory stays flat.
+# ============================================================
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from services.data_service import DATASET_SCHEMA, SERVICE_RATING_COLUMNS, atomic_write
+
+GENERATED_COLUMNS = list(DATASET_SCHEMA)
+CHUNK_ROWS = 250_000
+
+# How strongly each rating follows the passenger's latent experience score
+RATING_LOADINGS = {
+    "Inflight wifi service": 0.9,
+    "Departure/Arrival time convenient": 0.2,
+    "Ease of Online booking": 0.6,
+    "Gate location": 0.1,
+    "Food and drink": 0.5,
+    "Online boarding": 1.0,
+    "Seat comfort": 0.8,
+    "Inflight entertainment": 0.9,
+    "On-board service": 0.7,
+    "Leg room service": 0.7,
+    "Baggage handling": 0.5,
+    "Checkin service": 0.5,
+    "Inflight service": 0.5,
+    "Cleanliness": 0.7,
+}
+
+
+def _pick(rng: np.random.Generator, labels: list[str], p: list[float], n: int) -> np.ndarray:
+    return np.asarray(labels)[rng.choice(len(labels), size=n, p=p)]
+
+
+def generate_chunk(start: int, rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Rows ``start .. start+rows-1`` of the synthetic dataset.
+    Chunks are independent: each has its own RNG stream from (seed, start).
+    """
+    rng = np.random.default_rng([seed, start])
+    n = rows
+    row = np.arange(start, start + n, dtype=np.int64)
+
+    gender = _pick(rng, ["Female", "Male"], [0.507, 0.493], n)
+    loyal = rng.random(n) < 0.82
+    business_trip = rng.random(n) < 0.69
+    # Business travellers mostly fly Business; leisure mostly Eco
+    p_business = np.where(business_trip, 0.66, 0.08)
+    u = rng.random(n)
+    cls = np.where(u < p_business, "Business", np.where(u < p_business + 0.08, "Eco Plus", "Eco"))
+
+    age = np.clip(np.rint(rng.normal(np.where(business_trip, 42, 36), 14)), 7, 85).astype(np.uint8)
+
+    # Right-skewed distances; premium cabins skew long-haul
+    distance = rng.lognormal(np.log(850), 0.75, n) * np.where(cls == "Business", 1.6, 1.0)
+    distance = np.clip(np.rint(distance), 31, 4983).astype(np.int16)
+
+    # Heavy-tailed delays: ~56% on time, Pareto tail; arrival tracks departure
+    late = rng.random(n) >= 0.56
+    dep = np.where(late, np.floor(rng.pareto(1.7, n) * 14) + 1, 0)
+    dep = np.minimum(dep, 1600).astype(np.int32)
+    arr = np.maximum(dep + np.rint(rng.normal(0.5, 6.0, n) - 0.002 * distance * rng.random(n)), 0).astype(np.float32)
+    arr[rng.random(n) < 0.003] = np.nan
+
+    # Latent experience score drives both the ratings and satisfaction
+    quality = rng.normal(0, 1, n) + 0.5 * (cls == "Business") - 0.004 * np.minimum(dep, 240)
+    ratings = {}
+    for col in SERVICE_RATING_COLUMNS:
+        score = 2.8 + 1.1 * RATING_LOADINGS[col] * quality + rng.normal(0, 1.0, n)
+        score = np.clip(np.rint(score), 1, 5)
+        score[rng.random(n) < 0.03] = 0  # 0 = not rated / not applicable
+        ratings[col] = score.astype(np.int8)
+
+    logit = 1.6 * quality + 0.9 * business_trip + 0.4 * loyal - 1.5
+    satisfied = rng.random(n) < 1.0 / (1.0 + np.exp(-logit))
+
+    data = {
+        "Unnamed: 0": row.astype(np.int32),
+        "id": (row + 1).astype(np.int32),
+        "Gender": gender,
+        "Customer Type": np.where(loyal, "Loyal Customer", "disloyal Customer"),
+        "Age": age,
+        "Type of Travel": np.where(business_trip, "Business travel", "Personal Travel"),
+        "Class": cls,
+        "Flight Distance": distance,
+        **ratings,
+        "Departure Delay in Minutes": dep,
+        "Arrival Delay in Minutes": arr,
+        "satisfaction": np.where(satisfied, "satisfied", "neutral or dissatisfied"),
+    }
+    return pd.DataFrame(data, columns=GENERATED_COLUMNS)
+
+
+def _chunk_csv(start: int, rows: int, seed: int) -> bytes:
+    """Process-pool worker: one chunk as header-less CSV bytes."""
+    return generate_chunk(start, rows, seed).to_csv(index=False, header=False).encode()
+
+
+def generate_csv(
+    out: str | os.PathLike,
+    rows: int,
+    seed: int = 42,
+    workers: int | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+    progress: bool = False,
+) -> Path:
+    """
+    Write ``rows`` synthetic rows to ``out`` (atomically) and return its path.
+    At most 2 x workers chunks are held in memory at any time.
+    """
+    if rows < 0:
+        raise ValueError("rows must be >= 0")
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    starts = list(range(0, rows, chunk_rows))
+    t0 = time.perf_counter()
+
+    def report(written: int) -> None:
+        if progress:
+            rate = written / max(time.perf_counter() - t0, 1e-9)
+            print(f"\r - {written:,} / {rows:,} rows ({rate:,.0f} rows/s)", end="", flush=True)
+
+    def write(tmp: Path) -> None:
+        with open(tmp, "wb") as fh:
+            fh.write((",".join(GENERATED_COLUMNS) + "\n").encode())
+            if workers <= 1:
+                for start in starts:
+                    fh.write(_chunk_csv(start, min(chunk_rows, rows - start), seed))
+                    report(min(start + chunk_rows, rows))
+                if progress:
+                    print()
+                return
+
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                pending = []
+                next_chunk = 0
+                while next_chunk < len(starts) or pending:
+                    while next_chunk < len(starts) and len(pending) < 2 * workers:
+                        start = starts[next_chunk]
+                        pending.append((start, pool.submit(_chunk_csv, start, min(chunk_rows, rows - start), seed)))
+                        next_chunk += 1
+                    start, future = pending.pop(0)
+                    fh.write(future.result())
+                    report(min(start + chunk_rows, rows))
+                if progress:
+                    print()
+
+    atomic_write(out, write)
+    return out
+
+
+def main(argv: list[str] | None = None) -> None:
+    """``python Dashboard.py generate --rows N --out PATH [--seed S] [--workers W]``"""
+    parser = argparse.ArgumentParser(prog="Dashboard.py generate", description="Write a synthetic train.csv-shaped dataset.")
+    parser.add_argument("--rows", type=int, required=True, help="number of passenger rows")
+    parser.add_argument("--out", default="assets/synthetic.csv", help="output CSV path")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    print(f"Generating {args.rows:,} rows -> {args.out}")
+    out = generate_csv(args.out, args.rows, args.seed, args.workers, args.chunk_rows, progress=True)
+    size_mb = out.stat().st_size / (1024 * 1024)
+    print(f"Wrote {out} ({size_mb:,.1f} MB) in {time.perf_counter() - t0:.1f} s")
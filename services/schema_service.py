@@ -0,0 +1,104 @@
+# ============================================================
+# schema_service.py – Canonical column resolver
+#
+# Maps stable logical field names ("distance", "dep_delay",
+# "satisfaction", "onboard_service", ...) to the physical column
+# names of a dataset. A mapping is computed once per header and
+# cached; data_service keys it by dataset fingerprint.
+# ============================================================
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Mapping, Sequence
+
+# Service rating fields: logical name -> canonical column in train.csv
+SERVICE_RATING_FIELDS: dict[str, str] = {
+    "inflight_wifi": "Inflight wifi service",
+    "time_convenient": "Departure/Arrival time convenient",
+    "online_booking": "Ease of Online booking",
+    "gate_location": "Gate location",
+    "food_and_drink": "Food and drink",
+    "online_boarding": "Online boarding",
+    "seat_comfort": "Seat comfort",
+    "inflight_entertainment": "Inflight entertainment",
+    "onboard_service": "On-board service",
+    "leg_room": "Leg room service",
+    "baggage_handling": "Baggage handling",
+    "checkin_service": "Checkin service",
+    "inflight_service": "Inflight service",
+    "cleanliness": "Cleanliness",
+}
+
+# Logical field -> physical candidates, in priority order (case-insensitive)
+LOGICAL_FIELDS: dict[str, list[str]] = {
+    "id": ["id", "ID", "passenger_id"],
+    "gender": ["Gender", "gender", "sex"],
+    "customer_type": ["Customer Type", "CustomerType", "customer_type"],
+    "age": ["Age", "age"],
+    "type_of_travel": ["Type of Travel", "TypeOfTravel", "type_of_travel"],
+    "class": ["Class", "class", "travel_class"],
+    "distance": ["Flight Distance", "FlightDistance", "Distance", "flight_distance"],
+    "dep_delay": ["Departure Delay in Minutes", "DepartureDelay", "DepDelay", "departure_delay", "dep_delay"],
+    "arr_delay": ["Arrival Delay in Minutes", "ArrivalDelay", "ArrDelay", "arrival_delay", "arr_delay"],
+    "satisfaction": ["satisfaction", "Satisfaction", "satisfied"],
+    **{
+        field: [column, column.replace(" ", ""), column.lower().replace(" ", "_").replace("-", "_"), field]
+        for field, column in SERVICE_RATING_FIELDS.items()
+    },
+}
+
+
+@dataclass(frozen=True)
+class SchemaMap:
+    """Logical -> physical mapping for one dataset header."""
+
+    columns: tuple[str, ...]
+    fields: Mapping[str, str]
+
+    def get(self, name: str) -> str | None:
+        """Physical column for a logical field or a (case-insensitive) physical name."""
+        hit = self.fields.get(name)
+        if hit is not None:
+            return hit
+        lookup = _physical_lookup(self.columns)
+        return lookup.get(name) or lookup.get(name.lower())
+
+    def require(self, name: str) -> str:
+        col = self.get(name)
+        if col is None:
+            raise KeyError(f"dataset has no column for {name!r}")
+        return col
+
+    def resolve(self, names: Iterable[str]) -> list[str]:
+        """Physical columns for ``names`` in header order; unknown names are skipped."""
+        wanted = {col for col in (self.get(n) for n in names) if col is not None}
+        return [c for c in self.columns if c in wanted]
+
+
+@lru_cache(maxsize=64)
+def _physical_lookup(columns: tuple[str, ...]) -> dict[str, str]:
+    # exact names first, then lower-case aliases (first column wins)
+    lookup = {c: c for c in columns}
+    for c in columns:
+        lookup.setdefault(c.lower(), c)
+    return lookup
+
+
+@lru_cache(maxsize=64)
+def _resolve(columns: tuple[str, ...]) -> SchemaMap:
+    lookup = _physical_lookup(columns)
+    fields = {}
+    for field, candidates in LOGICAL_FIELDS.items():
+        for cand in candidates:
+            hit = lookup.get(cand) or lookup.get(cand.lower())
+            if hit is not None:
+                fields[field] = hit
+                break
+    return SchemaMap(columns, fields)
+
+
+def resolve_schema(columns: Sequence[str]) -> SchemaMap:
+    """Return the (cached) SchemaMap for a header, e.g. ``resolve_schema(df.columns)``."""
+    return _resolve(tuple(str(c) for c in columns))
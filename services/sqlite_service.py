@@ -0,0 +1,335 @@
+# ============================================================
+# sqlite_service.py – Indexed SQLite backend for filtered queries
+#
+# With SIA_BACKEND=sqlite, Modules 1 and 2 answer their filters from an
+# indexed SQLite copy of the dataset instead of in-memory structures.
+# The copy is streamed in batches from data_service.iter_batches(),
+# stored next to the CSV (<stem>.sqlite) and rebuilt when the source
+# fingerprint changes. Counts, means, extents, histograms and exact
+# quantiles run inside the engine; sql_rows() fetches only the rows a
+# chart draws and iter_sql_rows() streams the rest in batches, keyed by
+# dataset row number.
+# ============================================================
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from services.data_service import (
+    BASE_DIR, Fingerprint, atomic_write, file_fingerprint, iter_batches, schema_map, to_float_array,
+)
+from services.schema_service import SchemaMap
+
+logger = logging.getLogger(__name__)
+
+# Storage backend for filtered aggregates: "memory" (default) or "sqlite".
+STORAGE_BACKEND = os.environ.get("SIA_BACKEND", "memory").lower()
+SQLITE_VERSION = 1
+SQLITE_INDEXED_FIELDS = ["distance", "dep_delay", "arr_delay", "satisfaction", "class"]
+
+_sqlite_lock = threading.Lock()
+
+
+def storage_backend() -> str:
+    """Configured backend for filtered aggregates ("memory" or "sqlite")."""
+    return STORAGE_BACKEND
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sqlite_path(fp: Fingerprint) -> Path:
+    if fp.parts:
+        digest = hashlib.blake2b(fp.path.encode(), digest_size=8).hexdigest()
+        return BASE_DIR / ".cache" / "sqlite" / f"{Path(fp.path).name}-{digest}.sqlite"
+    return Path(fp.path).with_suffix(".sqlite")
+
+
+def _sqlite_is_current(db: Path, fp: Fingerprint) -> bool:
+    try:
+        with sqlite3.connect(f"file:{db}?mode=ro", uri=True) as con:
+            meta = dict(con.execute("SELECT key, value FROM _meta").fetchall())
+    except sqlite3.Error:
+        return False
+    return meta.get("version") == str(SQLITE_VERSION) and meta.get("source") == f"{fp.size}:{fp.mtime_ns}:{fp.parts}"
+
+
+def _sql_values(s: pd.Series) -> list:
+    """Python values for sqlite3 (numpy scalars are not bindable; NaN/NA -> NULL)."""
+    if not pd.api.types.is_numeric_dtype(s.dtype):
+        return s.astype(object).where(s.notna(), None).tolist()
+    if s.dtype.kind in "iu":
+        return s.tolist()
+    return to_float_array(s).tolist()  # sqlite3 binds NaN as NULL
+
+
+def _write_sqlite(target: Path, fp: Fingerprint, path: str | os.PathLike | None, batch_size: int) -> None:
+    """Stream the dataset into ``target`` in batches (bounded memory), then index it."""
+    con = sqlite3.connect(target)
+    try:
+        con.execute("PRAGMA journal_mode=OFF")
+        con.execute("PRAGMA synchronous=OFF")
+        for i, chunk in enumerate(iter_batches(batch_size, path=path)):
+            if i == 0:
+                header = list(chunk.columns)
+                insert = f"INSERT INTO passengers VALUES ({', '.join('?' * len(header))})"
+                types = [
+                    ("INTEGER" if chunk[c].dtype.kind in "iu" else "REAL")
+                    if pd.api.types.is_numeric_dtype(chunk[c].dtype)
+                    else "TEXT"
+                    for c in header
+                ]
+                con.execute(f"CREATE TABLE passengers ({', '.join(f'{_quote(c)} {t}' for c, t in zip(header, types))})")
+            con.executemany(insert, zip(*(_sql_values(chunk[c]) for c in header)))
+        schema = schema_map(path)
+        for fld in SQLITE_INDEXED_FIELDS:
+            col = schema.get(fld)
+            if col is not None:
+                con.execute(f"CREATE INDEX {_quote('ix_' + fld)} ON passengers ({_quote(col)})")
+        con.execute("CREATE TABLE _meta (key TEXT PRIMARY KEY, value TEXT)")
+        con.executemany(
+            "INSERT INTO _meta VALUES (?, ?)",
+            [("version", str(SQLITE_VERSION)), ("source", f"{fp.size}:{fp.mtime_ns}:{fp.parts}")],
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
+def sqlite_database(
+    path: str | os.PathLike | None = None, rebuild: bool = False, batch_size: int = 100_000
+) -> Path:
+    """
+    Path of the indexed SQLite copy of the dataset, (re)building it
+    when missing or older than the source. Indexes cover distance,
+    delays, satisfaction and class.
+    """
+    fp = file_fingerprint(path)
+    db = _sqlite_path(fp)
+    with _sqlite_lock:
+        if rebuild or not _sqlite_is_current(db, fp):
+            db.parent.mkdir(parents=True, exist_ok=True)
+            t0 = time.perf_counter()
+            atomic_write(db, lambda tmp: _write_sqlite(tmp, fp, path, batch_size))
+            logger.info("Built SQLite copy %s in %.0f ms", db.name, (time.perf_counter() - t0) * 1000.0)
+    return db
+
+
+def _sql_condition(col: str, rule: object) -> tuple[str, list]:
+    """(lo, hi) tuple -> BETWEEN (None = open end); list/set -> IN (None matches NULL)."""
+    if isinstance(rule, tuple):
+        lo, hi = rule
+        parts, params = [], []
+        if lo is not None:
+            parts.append(f"{_quote(col)} >= ?")
+            params.append(float(lo))
+        if hi is not None:
+            parts.append(f"{_quote(col)} <= ?")
+            params.append(float(hi))
+        return " AND ".join(parts) or "1", params
+    values = [v for v in rule if v is not None]
+    sql = f"{_quote(col)} IN ({', '.join('?' * len(values))})" if values else "0"
+    if len(values) != len(list(rule)):
+        sql = f"({sql} OR {_quote(col)} IS NULL)"
+    return sql, [str(v) for v in values]
+
+
+def _sql_where(schema: SchemaMap, where: Mapping[str, object] | None, *extra: str) -> tuple[str, list]:
+    """``where`` (logical or physical keys) plus ``extra`` SQL terms as one condition."""
+    conditions, params = list(extra), []
+    for key, rule in (where or {}).items():
+        sql, values = _sql_condition(schema.require(key), rule)
+        conditions.append(sql)
+        params.extend(values)
+    return " AND ".join(conditions) or "1", params
+
+
+def sql_aggregate(
+    means: Sequence[str] = (),
+    where: Mapping[str, object] | None = None,
+    group_by: str | None = None,
+    path: str | os.PathLike | None = None,
+) -> pd.DataFrame:
+    """
+    Filtered aggregates computed inside SQLite.
+
+    ``means`` and the keys of ``where`` / ``group_by`` accept physical or
+    logical names. ``where`` values are (lo, hi) ranges or lists of
+    allowed values. Returns one row (or one per group) with a "count"
+    column and the mean of each column in ``means`` (NULLs skipped).
+    """
+    db = sqlite_database(path)
+    schema = schema_map(path)
+    mean_cols = [schema.require(m) for m in means]
+    group_col = schema.require(group_by) if group_by else None
+    condition, params = _sql_where(schema, where)
+
+    select = ["COUNT(*) AS count", *(f"AVG({_quote(c)}) AS {_quote(c)}" for c in mean_cols)]
+    if group_col:
+        select.insert(0, f"{_quote(group_col)} AS {_quote(group_col)}")
+    query = f"SELECT {', '.join(select)} FROM passengers WHERE {condition}"
+    if group_col:
+        query += f" GROUP BY {_quote(group_col)} ORDER BY {_quote(group_col)}"
+
+    with sqlite3.connect(f"file:{db}?mode=ro", uri=True) as con:
+        rows = con.execute(query, params).fetchall()
+    columns = ([group_col] if group_col else []) + ["count", *mean_cols]
+    out = pd.DataFrame(rows, columns=columns)
+    if group_col:
+        out = out.set_index(group_col)
+    return out
+
+
+def _sql_query(db: Path, query: str, params: list) -> list[tuple]:
+    with sqlite3.connect(f"file:{db}?mode=ro", uri=True) as con:
+        return con.execute(query, params).fetchall()
+
+
+def sql_extent(
+    name: str, where: Mapping[str, object] | None = None, path: str | os.PathLike | None = None
+) -> tuple[float, float] | None:
+    """(min, max) of a numeric column over the filtered rows; None when there are no values."""
+    db = sqlite_database(path)
+    schema = schema_map(path)
+    col = _quote(schema.require(name))
+    condition, params = _sql_where(schema, where)
+    lo, hi = _sql_query(db, f"SELECT MIN({col}), MAX({col}) FROM passengers WHERE {condition}", params)[0]
+    return None if lo is None else (float(lo), float(hi))
+
+
+def sql_histogram(
+    name: str,
+    edges: np.ndarray,
+    where: Mapping[str, object] | None = None,
+    group_by: str | None = None,
+    right: bool = False,
+    path: str | os.PathLike | None = None,
+) -> pd.DataFrame:
+    """
+    Row counts per bin of a numeric column, binned inside SQLite.
+    ``edges`` must be evenly spaced; bins are [a, b) except the last
+    (as np.histogram), or (a, b] except the first with ``right=True``
+    (as pd.cut). One row per bin with a "count" column, or one column
+    per ``group_by`` value.
+    """
+    db = sqlite_database(path)
+    schema = schema_map(path)
+    edges = np.asarray(edges, dtype=np.float64)
+    nbins = len(edges) - 1
+    col = _quote(schema.require(name))
+    condition, params = _sql_where(schema, where, f"{col} >= ? AND {col} <= ?")
+    params = [float(edges[0]), float(edges[-1]), *params]
+    width = (edges[-1] - edges[0]) / nbins or 1.0
+    if right:
+        # counted down from the last edge, so values on an inner edge fall in the lower bin
+        bucket = f"{nbins - 1} - MIN(CAST((? - {col}) / ? AS INTEGER), {nbins - 1})"
+        origin = float(edges[-1])
+    else:
+        bucket = f"MIN(CAST(({col} - ?) / ? AS INTEGER), {nbins - 1})"
+        origin = float(edges[0])
+    group = _quote(schema.require(group_by)) if group_by else "NULL"
+    rows = _sql_query(
+        db,
+        f"SELECT {bucket} AS bin, {group} AS grp, COUNT(*) FROM passengers WHERE {condition} GROUP BY bin, grp",
+        [origin, width, *params],
+    )
+    out = pd.DataFrame(rows, columns=["bin", "group", "count"])
+    if not group_by:
+        return out.set_index("bin")[["count"]].reindex(range(nbins), fill_value=0)
+    counts = out.set_index(["bin", "group"])["count"].unstack("group", fill_value=0)
+    return counts.reindex(range(nbins), fill_value=0)
+
+
+def sql_quantiles(
+    name: str, qs: Sequence[float], where: Mapping[str, object] | None = None, path: str | os.PathLike | None = None
+) -> np.ndarray:
+    """
+    Exact quantiles (np.quantile, linear interpolation; NULLs skipped)
+    of a numeric column over the filtered rows. Only the order
+    statistics needed are returned by SQLite.
+    """
+    db = sqlite_database(path)
+    schema = schema_map(path)
+    col = _quote(schema.require(name))
+    condition, params = _sql_where(schema, where, f"{col} IS NOT NULL")
+    qs = np.asarray(qs, dtype=np.float64)
+    n = _sql_query(db, f"SELECT COUNT(*) FROM passengers WHERE {condition}", params)[0][0]
+    if n == 0:
+        return np.full(qs.shape, np.nan)
+    h = (n - 1) * qs
+    i = np.floor(h).astype(np.int64)
+    j = np.minimum(i + 1, n - 1)
+    ranks = sorted({int(k) for k in (*i, *j)})
+    rows = _sql_query(
+        db,
+        f"SELECT k, v FROM (SELECT {col} AS v, ROW_NUMBER() OVER (ORDER BY {col}) - 1 AS k"
+        f" FROM passengers WHERE {condition}) WHERE k IN ({', '.join('?' * len(ranks))})",
+        [*params, *ranks],
+    )
+    value = dict(rows)
+    lo = np.array([value[k] for k in i], dtype=np.float64)
+    hi = np.array([value[k] for k in j], dtype=np.float64)
+    return lo + (h - i) * (hi - lo)
+
+
+def _rows_query(
+    schema: SchemaMap, columns: Sequence[str], where: Mapping[str, object] | None, limit: int | None
+) -> tuple[str, list, list[str]]:
+    cols = [schema.require(c) for c in columns]
+    condition, params = _sql_where(schema, where)
+    query = f"SELECT {', '.join(['rowid - 1', *map(_quote, cols)])} FROM passengers WHERE {condition}"
+    if limit is not None:
+        # multiplicative hash of the row id: a stable shuffle evaluated in the engine
+        query += " ORDER BY (rowid * 2654435761) % 4294967296 LIMIT ?"
+        params = [*params, int(limit)]
+    else:
+        query += " ORDER BY rowid"
+    return query, params, cols
+
+
+def _rows_frame(rows: list[tuple], cols: list[str]) -> pd.DataFrame:
+    out = pd.DataFrame(rows, columns=["row", *cols]).set_index("row")
+    out.index.name = None
+    return out
+
+
+def sql_rows(
+    columns: Sequence[str] = (),
+    where: Mapping[str, object] | None = None,
+    limit: int | None = None,
+    path: str | os.PathLike | None = None,
+) -> pd.DataFrame:
+    """
+    Filtered rows fetched from SQLite, indexed by dataset row number.
+    With ``limit`` the rows are a fixed pseudo-random sample (the same
+    rows on every call), so only the rows a chart draws are read.
+    """
+    db = sqlite_database(path)
+    query, params, cols = _rows_query(schema_map(path), columns, where, limit)
+    return _rows_frame(_sql_query(db, query, params), cols)
+
+
+def iter_sql_rows(
+    columns: Sequence[str] = (),
+    where: Mapping[str, object] | None = None,
+    batch_size: int = 100_000,
+    path: str | os.PathLike | None = None,
+) -> Iterator[pd.DataFrame]:
+    """sql_rows() over every filtered row, yielded ``batch_size`` rows at a time (bounded memory)."""
+    db = sqlite_database(path)
+    query, params, cols = _rows_query(schema_map(path), columns, where, None)
+    with sqlite3.connect(f"file:{db}?mode=ro", uri=True) as con:
+        cursor = con.execute(query, params)
+        while rows := cursor.fetchmany(batch_size):
+            yield _rows_frame(rows, cols)
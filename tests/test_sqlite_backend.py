@@ -0,0 +1,34 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import pytest  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import pages.Module1_Flight_Performance  # noqa: E402,F401  (imported outside a runtime: no auto-run)
+from services import artifact_service, data_service, sqlite_service  # noqa: E402
+from services.generator_service import generate_csv  # noqa: E402
+
+
+@pytest.fixture
+def sqlite_dataset(tmp_path, monkeypatch):
+    csv = generate_csv(tmp_path / "flights.csv", rows=5000, workers=1)
+    monkeypatch.setattr(data_service, "DATA_PATH", csv)
+    monkeypatch.setattr(artifact_service, "ARTIFACT_DIR", tmp_path / "artifacts")  # cold artifact store
+    monkeypatch.setattr(sqlite_service, "STORAGE_BACKEND", "sqlite")
+    data_service.clear_cache()
+    return csv
+
+
+def test_module1_sqlite_run_does_not_load_dataset(sqlite_dataset):
+    misses = data_service.cache_stats()["misses"]
+
+    at = AppTest.from_string(
+        "from pages.Module1_Flight_Performance import run_flight_performance_ui\nrun_flight_performance_ui()",
+        default_timeout=120,
+    ).run()
+    at.slider[0].set_value((500.0, 2000.0)).run()
+
+    assert not at.exception
+    assert len(at.radio) == 0  # no density toggle on the SQLite backend
+    assert data_service.cache_stats()["misses"] - misses == 0